@@ -0,0 +1,92 @@
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda",
+               "Priya", "Rahul", "Anita", "Vikram", "Sofia", "Mateo", "Yuki", "Chen"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+              "Sharma", "Patel", "Yeole", "Kumar", "Rossi", "Silva", "Tanaka", "Wang"]
+REASONS = {
+    "Health": ["Hospitalisation after a fall", "Surgery and post operative care",
+               "Emergency room visit for chest pain", "Medical expenses for routine checkup"],
+    "Vehicle": ["Rear end collision on the highway", "Windscreen damaged by hail",
+                "Theft of vehicle from parking lot", "Flood damage to engine"],
+    "Life": ["Death benefit claim by nominee", "Terminal illness accelerated benefit",
+             "Critical illness rider payout", "Accidental death benefit claim"]
+}
+POLICY_WEIGHTS = {"Health": 0.5, "Vehicle": 0.35, "Life": 0.15}
+SUM_INSURED = {"Health": (50000, 500000), "Vehicle": (10000, 80000), "Life": (100000, 2000000)}
+CLAIM_FRACTION = {"Health": (0.005, 0.2), "Vehicle": (0.02, 0.6), "Life": (0.1, 1.0)}
+STATUS_WEIGHTS = {"Approved": 0.6, "Pending": 0.25, "Rejected": 0.15}
+HISTORY_DAYS = 3 * 365
+
+
+def generate_portfolio(num_claims: int, claims_per_policyholder: int = 10, seed: int = 42,
+                       now: Optional[datetime] = None) -> Tuple[Dict[str, dict], Dict[str, dict]]:
+    """Generate a deterministic portfolio of policyholders and claims.
+
+    Records are valid against the Policyholder and Claim models. Claim dates
+    spread over three years with more recent activity, and the status mix is
+    roughly 60% approved, 25% pending and 15% rejected, with pending claims
+    skewed towards recent months as in a real queue.
+    """
+    rng = random.Random(seed)
+    now = now or datetime(2026, 1, 1)
+    num_policyholders = max(1, num_claims // claims_per_policyholder)
+    policy_types = list(POLICY_WEIGHTS)
+    policy_weights = list(POLICY_WEIGHTS.values())
+
+    policyholders = {}
+    for i in range(1, num_policyholders + 1):
+        policyholder_id = f"PH{i:07d}"
+        policy_type = rng.choices(policy_types, policy_weights)[0]
+        low, high = SUM_INSURED[policy_type]
+        registration = now - timedelta(days=HISTORY_DAYS + rng.randint(0, 5 * 365),
+                                       seconds=rng.randint(0, 86399))
+        policyholders[policyholder_id] = {
+            "policyholder_id": policyholder_id,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "age": rng.randint(18, 85),
+            "policy_type": policy_type,
+            "sum_insured": float(round(rng.uniform(low, high), -3)),
+            "registration_date": str(registration)
+        }
+
+    policyholder_ids = list(policyholders)
+    statuses = list(STATUS_WEIGHTS)
+    status_weights = list(STATUS_WEIGHTS.values())
+    claims = {}
+    for i in range(1, num_claims + 1):
+        claim_id = f"CL{i:07d}"
+        # Pareto-skewed choice: a minority of policyholders file most claims
+        index = min(int(rng.paretovariate(1.2)) - 1, num_policyholders - 1)
+        policyholder = policyholders[policyholder_ids[(index * 7919 + i) % num_policyholders]]
+        policy_type = policyholder["policy_type"]
+        # Triangular age distribution: recent months are busier than old ones
+        age_days = rng.triangular(0, HISTORY_DAYS, 0)
+        date_of_claim = now - timedelta(days=age_days, microseconds=rng.randint(0, 999999))
+        status = rng.choices(statuses, status_weights)[0]
+        if status == "Pending" and age_days > 180 and rng.random() < 0.8:
+            status = "Approved"
+        low, high = CLAIM_FRACTION[policy_type]
+        claims[claim_id] = {
+            "claim_id": claim_id,
+            "policyholder_id": policyholder["policyholder_id"],
+            "claim_amount": round(policyholder["sum_insured"] * rng.uniform(low, high) / 4, 2) + 1.0,
+            "reason": rng.choice(REASONS[policy_type]),
+            "status": status,
+            "date_of_claim": str(date_of_claim)
+        }
+
+    return policyholders, claims
+
+
+def write_portfolio(data_dir: str, policyholders: Dict[str, dict], claims: Dict[str, dict]):
+    """Write a generated portfolio in the DataService JSON layout"""
+    os.makedirs(data_dir, exist_ok=True)
+    with open(f"{data_dir}/policyholders.json", "w") as f:
+        json.dump(policyholders, f)
+    with open(f"{data_dir}/claims.json", "w") as f:
+        json.dump(claims, f)
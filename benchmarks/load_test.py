@@ -0,0 +1,349 @@
+"""Load-test the Streamlit app with concurrent sessions on localhost.
+
+Starts `streamlit run main.py` on 127.0.0.1 against a generated portfolio and
+connects N websocket clients that speak Streamlit's own protocol, as browser
+tabs do. Every session clicks through each sidebar page, submits a claim and
+updates a claim status, and each rerun is timed from the request to the
+server's script_finished message. Reports p50/p95/p99 latency per page and
+action, reruns per second and the server's resident memory (Linux only).
+
+Usage:
+    python -m benchmarks.load_test --claims 10k --sessions 1,4,16 --rounds 3
+    python -m benchmarks.load_test --claims 100k --backend sqlite --sessions 8 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+from services.sqlite_data_service import migrate_json_to_sqlite
+from .generator import generate_portfolio, write_portfolio
+from .run import _git_revision, parse_scale
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+PAGES = ["Dashboard", "Policyholder Management", "Claim Management", "Risk Analysis", "Reports", "Diagnostics"]
+STATUSES = ["Pending", "Approved", "Rejected"]
+# Matches the server's default server.maxMessageSize of 200 MB
+MAX_MESSAGE_BYTES = 200 * 2 ** 20
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def process_memory(pid: int) -> Dict[str, Optional[int]]:
+    """Current and peak resident set size of a process in bytes; None where /proc is unavailable"""
+    memory = {"rss_bytes": None, "peak_rss_bytes": None}
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    memory["rss_bytes"] = int(line.split()[1]) * 1024
+                elif line.startswith("VmHWM:"):
+                    memory["peak_rss_bytes"] = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return memory
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+class AppServer:
+    """A `streamlit run main.py` process bound to localhost, serving data from work_dir"""
+
+    def __init__(self, work_dir: str, backend: str, startup_timeout: float):
+        self.port = _free_port()
+        self.log_path = f"{work_dir}/server.log"
+        env = dict(os.environ, STORAGE_BACKEND=backend)
+        with open(self.log_path, "w") as log:
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "streamlit", "run", MAIN_SCRIPT,
+                 "--server.headless=true", "--server.address=127.0.0.1", f"--server.port={self.port}",
+                 "--server.fileWatcherType=none", "--browser.gatherUsageStats=false"],
+                cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT
+            )
+        self._wait_until_healthy(startup_timeout)
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def _wait_until_healthy(self, timeout: float):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Streamlit exited with code {self.process.returncode}, see {self.log_path}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"Streamlit did not become healthy within {timeout:.0f}s, see {self.log_path}")
+
+    def memory(self) -> Dict[str, Optional[int]]:
+        return process_memory(self.process.pid)
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class Session:
+    """One browser tab: a websocket connection plus the widgets its last rerun drew"""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self.connection = None
+        self.page_script_hash = ""
+        # (element type, label) -> widget id
+        self.widgets: Dict[Tuple[str, str], str] = {}
+
+    async def connect(self):
+        self.connection = await websocket_connect(self.url, subprotocols=["streamlit"],
+                                                  max_message_size=MAX_MESSAGE_BYTES)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    def widget(self, kind: str, label: str) -> str:
+        try:
+            return self.widgets[(kind, label)]
+        except KeyError:
+            raise RuntimeError(f"The last rerun drew no {kind} labelled {label!r}") from None
+
+    def state(self, kind: str, label: str, **value) -> WidgetState:
+        return WidgetState(id=self.widget(kind, label), **value)
+
+    async def rerun(self, states: List[WidgetState]) -> Tuple[float, List[str]]:
+        """Send widget states like a browser interaction and wait for the script to finish.
+
+        Returns the wall time and the text of any exceptions or st.error alerts drawn.
+        """
+        message = BackMsg()
+        message.rerun_script.page_script_hash = self.page_script_hash
+        message.rerun_script.widget_states.widgets.extend(states)
+        errors = []
+        start = time.perf_counter()
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+        while True:
+            data = await asyncio.wait_for(self.connection.read_message(), self.timeout)
+            if data is None:
+                raise RuntimeError("The server closed the connection")
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = forward.new_session.page_script_hash
+            elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                self._read_element(forward.delta.new_element, errors)
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return time.perf_counter() - start, errors
+
+    def _read_element(self, element, errors: List[str]):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            errors.append(f"{element.exception.type}: {element.exception.message}")
+        elif kind == "alert":
+            if element.alert.format == Alert.ERROR:
+                errors.append(element.alert.body)
+        elif kind is not None:
+            proto = getattr(element, kind)
+            if hasattr(proto, "id") and hasattr(proto, "label") and proto.id:
+                self.widgets[(kind, proto.label)] = proto.id
+
+
+async def _run_session(url: str, rounds: int, think_seconds: float, timeout: float, seed: int,
+                       timings: Dict[str, List[float]], errors: Dict[str, List[str]]):
+    """Visit every page, then submit a claim and update a status on Claim Management, rounds times"""
+    rng = random.Random(seed)
+    session = Session(url, timeout)
+
+    async def act(name: str, states: List[WidgetState]):
+        seconds, messages = await session.rerun(states)
+        timings[name].append(seconds)
+        errors[name].extend(messages)
+        if think_seconds:
+            await asyncio.sleep(rng.uniform(0, 2 * think_seconds))
+
+    await session.connect()
+    try:
+        await act("Startup", [])
+        for _ in range(rounds):
+            for index, page in enumerate(PAGES):
+                radio = session.state("radio", "Select a page", int_value=index)
+                await act(page, [radio])
+                if page != "Claim Management":
+                    continue
+                await act("Claim Management: Submit Claim", [
+                    radio,
+                    session.state("selectbox", "Policyholder ID", int_value=0),
+                    session.state("number_input", "Claim Amount", double_value=round(rng.uniform(100, 20000), 2)),
+                    session.state("text_area", "Reason", string_value="Load test claim"),
+                    session.state("button", "Submit Claim", trigger_value=True)
+                ])
+                await act("Claim Management: Update Status", [
+                    radio,
+                    session.state("selectbox", "New Status", int_value=rng.randrange(len(STATUSES))),
+                    session.state("button", "Update Status", trigger_value=True)
+                ])
+    finally:
+        session.close()
+
+
+def run_level(server: AppServer, sessions: int, rounds: int, think_seconds: float, timeout: float,
+              seed: int) -> Dict:
+    """Run concurrent sessions against a server and summarise their timings"""
+    timings: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, List[str]] = defaultdict(list)
+    peak_rss = 0
+
+    async def sample_memory(done: asyncio.Event):
+        nonlocal peak_rss
+        while not done.is_set():
+            peak_rss = max(peak_rss, server.memory()["rss_bytes"] or 0)
+            await asyncio.sleep(0.25)
+
+    async def run_all():
+        done = asyncio.Event()
+        sampler = asyncio.create_task(sample_memory(done))
+        try:
+            await asyncio.gather(*(
+                _run_session(server.url, rounds, think_seconds, timeout, seed + i, timings, errors)
+                for i in range(sessions)
+            ))
+        finally:
+            done.set()
+            await sampler
+
+    start = time.perf_counter()
+    asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+
+    actions = []
+    for name, values in timings.items():
+        actions.append({
+            "action": name,
+            "runs": len(values),
+            "errors": len(errors[name]),
+            "p50_seconds": percentile(values, 0.5),
+            "p95_seconds": percentile(values, 0.95),
+            "p99_seconds": percentile(values, 0.99),
+            "max_seconds": max(values)
+        })
+    reruns = sum(action["runs"] for action in actions)
+    memory = server.memory()
+    return {
+        "sessions": sessions,
+        "reruns": reruns,
+        "seconds": elapsed,
+        "reruns_per_second": reruns / elapsed,
+        "rss_bytes": memory["rss_bytes"],
+        "sampled_peak_rss_bytes": peak_rss or None,
+        "process_peak_rss_bytes": memory["peak_rss_bytes"],
+        "actions": actions,
+        "error_samples": sorted({message for messages in errors.values() for message in messages})[:10]
+    }
+
+
+def _mib(value: Optional[int]) -> str:
+    return f"{value / 2 ** 20:.1f} MiB" if value else "n/a"
+
+
+def print_level(level: Dict):
+    print(f"\n{level['sessions']} concurrent sessions: {level['reruns']} reruns in {level['seconds']:.1f}s "
+          f"({level['reruns_per_second']:.1f}/s), server RSS {_mib(level['rss_bytes'])}, "
+          f"peak {_mib(level['process_peak_rss_bytes'])}")
+    print(f"{'action':<36} {'runs':>5} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for action in level["actions"]:
+        print(f"{action['action']:<36} {action['runs']:>5} {action['errors']:>6} "
+              f"{action['p50_seconds'] * 1000:>9.1f} {action['p95_seconds'] * 1000:>9.1f} "
+              f"{action['p99_seconds'] * 1000:>9.1f} {action['max_seconds'] * 1000:>9.1f}")
+    for message in level["error_samples"]:
+        print(f"  error: {message}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the Streamlit pages with concurrent local sessions")
+    parser.add_argument("--claims", default="10k", help="Portfolio size, e.g. 10k or 1m")
+    parser.add_argument("--backend", choices=["json", "partitioned", "sqlite"], default="json",
+                        help="STORAGE_BACKEND for the server")
+    parser.add_argument("--sessions", default="1,4,16", help="Comma separated concurrency levels, run in order")
+    parser.add_argument("--rounds", type=int, default=3, help="Passes over every page per session")
+    parser.add_argument("--think", type=float, default=0.0, help="Mean pause in seconds between actions")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for one rerun")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    num_claims = parse_scale(args.claims)
+    work_dir = tempfile.mkdtemp(prefix="insurance-load-")
+    levels = []
+    try:
+        write_portfolio(f"{work_dir}/data", *generate_portfolio(num_claims, seed=args.seed))
+        if args.backend == "sqlite":
+            migrate_json_to_sqlite(f"{work_dir}/data")
+
+        server = AppServer(work_dir, args.backend, args.timeout)
+        try:
+            print(f"Serving {num_claims} claims ({args.backend}) on 127.0.0.1:{server.port}, "
+                  f"server RSS {_mib(server.memory()['rss_bytes'])}")
+            for sessions in args.sessions.split(","):
+                level = run_level(server, int(sessions), args.rounds, args.think, args.timeout, args.seed)
+                print_level(level)
+                levels.append(level)
+        finally:
+            server.stop()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        report = {
+            "revision": _git_revision(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "claims": num_claims,
+            "backend": args.backend,
+            "rounds": args.rounds,
+            "think_seconds": args.think,
+            "levels": levels
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {len(levels)} concurrency levels to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
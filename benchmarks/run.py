@@ -0,0 +1,259 @@
+"""Time every public DataService, RiskService, ReportService, DashboardService and ExportService method.
+
+Usage:
+    python -m benchmarks.run --scales 1k,10k --backend json --output results.json
+    python -m benchmarks.run --scales 10k --compare results.json
+"""
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from pydantic import TypeAdapter
+from models.claim import Claim
+from models.policyholder import Policyholder
+from services.dashboard_service import DashboardService
+from services.data_service import create_data_service
+from services.export_service import ExportService, parquet_available
+from services.report_service import ReportService
+from services.risk_service import RiskService
+from services.sqlite_data_service import migrate_json_to_sqlite
+from services.storage_backend import StorageBackend
+from .generator import generate_portfolio, write_portfolio
+
+BACKENDS = {
+    "json": ("json", {}),
+    "journal": ("json", {"journal": True}),
+    "snapshot": ("json", {"journal": True, "binary_snapshot": True}),
+    "write_behind": ("json", {"journal": True, "write_behind": True}),
+    "partitioned": ("partitioned", {}),
+    "sqlite": ("sqlite", {})
+}
+
+
+def parse_scale(value: str) -> int:
+    """Parse 1k / 10k / 1m style sizes"""
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+def measure(fn: Callable, repeat: int) -> Dict:
+    """Wall time over repeat calls, then peak traced memory of one more call"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "first_seconds": timings[0],
+        "median_seconds": statistics.median(timings),
+        "peak_bytes": peak
+    }
+
+
+def _operations(data_service: StorageBackend, risk_service: RiskService, report_service: ReportService,
+                dashboard_service: DashboardService, export_service: ExportService,
+                export_dir: str) -> List[Tuple[str, Callable]]:
+    """Named calls covering the public API; read-only calls first, mutations last"""
+    claims = data_service.get_all_claims()
+    claim = claims[len(claims) // 2]
+    policyholder_id = claim["policyholder_id"]
+    month = str(claim["date_of_claim"])[:7]
+    counter = iter(range(10 ** 9))
+
+    def new_claim() -> dict:
+        return {
+            "claim_id": f"BENCH{next(counter):09d}",
+            "policyholder_id": policyholder_id,
+            "claim_amount": 1234.5,
+            "reason": "Benchmark generated claim",
+            "status": "Pending",
+            "date_of_claim": str(datetime.now())
+        }
+
+    def new_policyholder() -> dict:
+        return {
+            "policyholder_id": f"BENCH{next(counter):09d}",
+            "name": "Bench Mark",
+            "age": 40,
+            "policy_type": "Health",
+            "sum_insured": 100000.0,
+            "registration_date": str(datetime.now())
+        }
+
+    exports = [("ExportService.export_claims[csv]", lambda: export_service.export_claims(f"{export_dir}/claims.csv"))]
+    if parquet_available():
+        exports.append((
+            "ExportService.export_claims[parquet]",
+            lambda: export_service.export_claims(f"{export_dir}/claims.parquet")
+        ))
+
+    return [
+        ("DataService.get_policyholder", lambda: data_service.get_policyholder(policyholder_id)),
+        ("DataService.get_all_policyholders", data_service.get_all_policyholders),
+        ("DataService.count_policyholders", data_service.count_policyholders),
+        ("DataService.get_claim", lambda: data_service.get_claim(claim["claim_id"])),
+        ("DataService.get_all_claims", data_service.get_all_claims),
+        ("DataService.count_claims", data_service.count_claims),
+        ("DataService.get_policyholder_claims", lambda: data_service.get_policyholder_claims(policyholder_id)),
+        ("DataService.get_claims_by_status", lambda: data_service.get_claims_by_status("Pending")),
+        ("DataService.count_claims_by_status", lambda: data_service.count_claims_by_status("Pending")),
+        ("DataService.get_claims_by_month", lambda: data_service.get_claims_by_month(month)),
+        ("DataService.top_claims_by_amount", lambda: data_service.top_claims_by_amount(10)),
+        ("DataService.get_claims_in_date_range", lambda: data_service.get_claims_in_date_range(month, claim["date_of_claim"])),
+        ("DataService.latest_claims_by_status", lambda: data_service.latest_claims_by_status("Pending", 50)),
+        ("DataService.get_monthly_aggregates", data_service.get_monthly_aggregates),
+        ("DataService.get_monthly_aggregates[range]", lambda: data_service.get_monthly_aggregates(f"{month}-10", claim["date_of_claim"])),
+        ("DataService.get_policy_type_aggregates", data_service.get_policy_type_aggregates),
+        ("DataService.get_monthly_amount_sketches", data_service.get_monthly_amount_sketches),
+        ("DataService.get_policy_type_amount_sketches", data_service.get_policy_type_amount_sketches),
+        ("DataService.get_claims_frame", data_service.get_claims_frame),
+        ("DataService.query_claims", lambda: data_service.query_claims(limit=50)),
+        ("DataService.query_claims[filtered]", lambda: data_service.query_claims(
+            status="Pending", date_from=f"{month}-01", min_amount=1000.0, sort_by="claim_amount", limit=50)),
+        ("DataService.query_policyholders", lambda: data_service.query_policyholders(search="an", limit=50)),
+        ("DataService.search_claim_ids", lambda: data_service.search_claim_ids("CL9")),
+        ("DataService.iter_claims", lambda: sum(len(chunk) for chunk in data_service.iter_claims())),
+        ("DataService.reload_if_changed", data_service.reload_if_changed),
+        ("RiskService.calculate_claim_frequency", lambda: risk_service.calculate_claim_frequency(policyholder_id)),
+        ("RiskService.calculate_claim_frequencies", risk_service.calculate_claim_frequencies),
+        ("RiskService.identify_high_risk_policyholders", risk_service.identify_high_risk_policyholders),
+        ("RiskService.score_policyholders", risk_service.score_policyholders),
+        ("RiskService.analyze_claims_by_policy_type", risk_service.analyze_claims_by_policy_type),
+        ("ReportService.generate_monthly_claims_report", report_service.generate_monthly_claims_report),
+        ("ReportService.calculate_average_claim_by_policy", report_service.calculate_average_claim_by_policy),
+        ("ReportService.generate_monthly_percentiles_report", report_service.generate_monthly_percentiles_report),
+        ("ReportService.calculate_claim_percentiles", report_service.calculate_claim_percentiles),
+        ("ReportService.calculate_percentiles_by_policy", report_service.calculate_percentiles_by_policy),
+        ("ReportService.get_highest_claim", report_service.get_highest_claim),
+        ("ReportService.get_top_claims", report_service.get_top_claims),
+        ("ReportService.get_pending_claims_report", report_service.get_pending_claims_report),
+        ("DashboardService.get_snapshot", dashboard_service.get_snapshot),
+        *exports,
+        ("DataService.update_claim_status", lambda: data_service.update_claim_status(claim["claim_id"], "Approved")),
+        ("DataService.add_policyholder", lambda: data_service.add_policyholder(new_policyholder())),
+        ("DataService.add_claim", lambda: data_service.add_claim(new_claim())),
+        ("DataService.add_claims[100]", lambda: data_service.add_claims([new_claim() for _ in range(100)])),
+        # After the mutations, so there are changes to read back
+        ("DataService.changes_since[100]", lambda: data_service.changes_since(max(data_service.sequence - 100, 0))),
+    ]
+
+
+def run_scale(num_claims: int, backend_name: str, repeat: int, seed: int) -> List[Dict]:
+    """Benchmark one portfolio size against one backend"""
+    backend, options = BACKENDS[backend_name]
+    policyholders, claims = generate_portfolio(num_claims, seed=seed)
+    # Spot-check that the generator still produces model-valid records
+    TypeAdapter(List[Policyholder]).validate_python(list(policyholders.values())[:1000])
+    TypeAdapter(List[Claim]).validate_python(list(claims.values())[:1000])
+
+    data_dir = tempfile.mkdtemp(prefix="insurance-bench-")
+    results = []
+
+    def record(operation: str, stats: Dict):
+        results.append({"scale": num_claims, "backend": backend_name, "operation": operation, **stats})
+        print(f"{num_claims:>9} {backend_name:<8} {operation:<50} "
+              f"{stats['median_seconds'] * 1000:>10.2f} ms {stats['peak_bytes'] / 2 ** 20:>9.1f} MiB")
+
+    try:
+        write_portfolio(data_dir, policyholders, claims)
+        del policyholders, claims
+        if backend == "sqlite":
+            migrate_json_to_sqlite(data_dir)
+
+        record("load", measure(lambda: create_data_service(backend, data_dir, **options), repeat))
+        data_service = create_data_service(backend, data_dir, **options)
+        risk_service = RiskService(data_service)
+        report_service = ReportService(data_service)
+        dashboard_service = DashboardService(data_service, risk_service, report_service)
+        export_service = ExportService(data_service)
+        # Loaded before the mutations below, so it can catch up on them with apply_changes
+        replica = create_data_service(backend, data_dir, **options) if backend != "sqlite" else None
+
+        for operation, fn in _operations(data_service, risk_service, report_service, dashboard_service,
+                                         export_service, data_dir):
+            record(operation, measure(fn, repeat))
+
+        if backend != "sqlite":
+            record("flush", measure(data_service.flush, repeat))
+            record("save", measure(data_service.compact, repeat))
+            # first_seconds applies every change; the repeats find nothing new
+            record("DataService.apply_changes", measure(
+                lambda: replica.apply_changes(data_service.changes_since(replica.sequence)), repeat))
+            replica.close()
+        data_service.close()
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous: Dict, current: Dict):
+    """Print median wall time ratios against a previous results file"""
+    def key(r):
+        return r["scale"], r["backend"], r["operation"]
+    baseline = {key(r): r for r in previous["results"]}
+    print(f"\nCompared with {previous.get('revision')} (ratio > 1 is slower):")
+    for result in current["results"]:
+        old = baseline.get(key(result))
+        if old and old["median_seconds"] > 0:
+            ratio = result["median_seconds"] / old["median_seconds"]
+            print(f"{result['scale']:>9} {result['backend']:<8} {result['operation']:<50} {ratio:>6.2f}x")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the insurance services on synthetic portfolios")
+    parser.add_argument("--scales", default="1k,10k,100k", help="Comma separated claim counts, e.g. 1k,10k,100k,1m")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="json")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Previous results file to diff against")
+    args = parser.parse_args(argv)
+
+    results = []
+    for scale in args.scales.split(","):
+        results.extend(run_scale(parse_scale(scale), args.backend, args.repeat, args.seed))
+
+    report = {
+        "revision": _git_revision(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+from typing import Callable, Dict, Iterable, List, Optional
+import pandas as pd
+from .quantile_sketch import QuantileSketch
+
+
+class ClaimAggregate:
+    """Running count, sum, max, pending count and amount sketch for one group of claims"""
+
+    __slots__ = ("count", "_sum", "_compensation", "max_amount", "pending", "sketch")
+
+    def __init__(self):
+        self.count = 0
+        self._sum = 0.0
+        self._compensation = 0.0
+        self.max_amount: Optional[float] = None
+        self.pending = 0
+        # Sketches cannot forget a value, so None means "rebuild from the group's claims"
+        self.sketch: Optional[QuantileSketch] = QuantileSketch()
+
+    @property
+    def total(self) -> float:
+        return self._sum + self._compensation
+
+    def add_amount(self, amount: float):
+        """Neumaier-compensated add, so long runs of updates do not drift"""
+        new_sum = self._sum + amount
+        if abs(self._sum) >= abs(amount):
+            self._compensation += (self._sum - new_sum) + amount
+        else:
+            self._compensation += (amount - new_sum) + self._sum
+        self._sum = new_sum
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max_amount,
+            "pending": self.pending
+        }
+
+
+class AggregateStore:
+    """Claim aggregates keyed by a grouping value such as month or policy type"""
+
+    def __init__(self):
+        self.groups: Dict[str, ClaimAggregate] = {}
+
+    @classmethod
+    def from_columns(cls, keys: List[Optional[str]], amounts: List[float],
+                     pending: List[bool]) -> "AggregateStore":
+        """Build a store in one grouped pass; claims with a None key are skipped"""
+        store = cls()
+        if not keys:
+            return store
+        frame = pd.DataFrame({"key": keys, "amount": amounts, "pending": pending})
+        grouped = frame.groupby("key", sort=False).agg(
+            count=("amount", "size"),
+            total=("amount", "sum"),
+            max_amount=("amount", "max"),
+            pending=("pending", "sum")
+        )
+        for key, count, total, max_amount, pending_count in grouped.itertuples():
+            group = store.groups[key] = ClaimAggregate()
+            group.count = int(count)
+            group._sum = float(total)
+            group.max_amount = float(max_amount)
+            group.pending = int(pending_count)
+            group.sketch = None
+        return store
+
+    @classmethod
+    def from_dict(cls, groups: Dict[str, dict]) -> "AggregateStore":
+        """Rebuild a store from the output of to_dict"""
+        store = cls()
+        for key, values in groups.items():
+            group = store.groups[key] = ClaimAggregate()
+            group.count = values["count"]
+            group._sum = values["total"]
+            group.max_amount = values["max"]
+            group.pending = values["pending"]
+            group.sketch = None
+        return store
+
+    def rollup(self, key_of: Callable[[str], str]) -> "AggregateStore":
+        """Combine groups into coarser ones, such as month and policy type into policy type"""
+        store = AggregateStore()
+        for key, group in self.groups.items():
+            target = store.groups.get(key_of(key))
+            if target is None:
+                target = store.groups[key_of(key)] = ClaimAggregate()
+                target.sketch = None
+            target.count += group.count
+            target.add_amount(group.total)
+            if target.max_amount is None or (group.max_amount is not None and group.max_amount > target.max_amount):
+                target.max_amount = group.max_amount
+            target.pending += group.pending
+        return store
+
+    def add(self, key: str, amount: float, pending: bool):
+        """Count a claim towards a group"""
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = ClaimAggregate()
+        group.count += 1
+        group.add_amount(amount)
+        if group.max_amount is None or amount > group.max_amount:
+            group.max_amount = amount
+        if pending:
+            group.pending += 1
+        if group.sketch is not None:
+            group.sketch.update(amount)
+
+    def remove(self, key: str, amount: float, pending: bool) -> bool:
+        """Take a claim out of a group.
+
+        Returns True when the removed claim held the group maximum, in which
+        case the caller must supply the remaining amounts to recompute_max.
+        """
+        group = self.groups.get(key)
+        if group is None:
+            return False
+        group.count -= 1
+        group.add_amount(-amount)
+        if pending:
+            group.pending -= 1
+        group.sketch = None
+        if group.count == 0:
+            del self.groups[key]
+            return False
+        return amount == group.max_amount
+
+    def recompute_max(self, key: str, amounts: Iterable[float]):
+        """Reset a group's maximum from the amounts still in it"""
+        group = self.groups.get(key)
+        if group is not None:
+            group.max_amount = max(amounts, default=None)
+
+    def update_pending(self, key: str, delta: int):
+        """Adjust a group's pending count after a status change"""
+        group = self.groups.get(key)
+        if group is not None:
+            group.pending += delta
+
+    def stale_sketches(self) -> List[str]:
+        """Groups whose sketch must be rebuilt with rebuild_sketch before it is read"""
+        return [key for key, group in self.groups.items() if group.sketch is None]
+
+    def rebuild_sketch(self, key: str, amounts: Iterable[float]):
+        """Reset a group's sketch from the amounts in it"""
+        group = self.groups.get(key)
+        if group is not None:
+            group.sketch = QuantileSketch.from_values(amounts)
+
+    def sketches(self) -> Dict[str, QuantileSketch]:
+        """Amount sketch per group; call after rebuilding the stale ones"""
+        return {key: group.sketch for key, group in self.groups.items()}
+
+    def to_dict(self) -> Dict[str, dict]:
+        return {key: group.to_dict() for key, group in self.groups.items()}
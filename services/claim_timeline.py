@@ -0,0 +1,103 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional, Union
+import numpy as np
+import pandas as pd
+from .records import encode_date
+
+
+def to_epoch(value: Union[date, datetime]) -> int:
+    """Whole epoch seconds of a naive date or datetime, fractions truncated"""
+    return int(np.datetime64(value, "s").astype(np.int64))
+
+
+def claim_epoch(value: Union[int, str]) -> int:
+    """Whole epoch seconds of a claim date, given as a record date_value or a date string"""
+    value = encode_date(value)
+    if isinstance(value, int):
+        # Epoch microseconds; floor division truncates like astype("datetime64[s]")
+        return value // 1_000_000
+    return int(pd.Timestamp(value).to_datetime64().astype("datetime64[s]").astype(np.int64))
+
+
+def count_between(epochs: np.ndarray, after: Optional[int] = None, until: Optional[int] = None) -> int:
+    """Sorted timestamps with after < timestamp <= until; None bounds are open"""
+    start = 0 if after is None else int(np.searchsorted(epochs, after, side="right"))
+    stop = len(epochs) if until is None else int(np.searchsorted(epochs, until, side="right"))
+    return max(stop - start, 0)
+
+
+class ClaimTimeline:
+    """Claim timestamps of every policyholder as sorted epoch-second runs.
+
+    All timestamps live in one int64 array ordered by policyholder and then
+    by time. Each entry is also encoded as code * span + (epoch - base), which
+    keeps the whole array sorted, so the window count for one policyholder or
+    for the whole book is a pair of binary searches per policyholder.
+    """
+
+    def __init__(self, policyholder_ids: List[str], codes: np.ndarray, epochs: np.ndarray,
+                 presorted: bool = False):
+        if not presorted:
+            order = np.lexsort((epochs, codes))
+            codes, epochs = codes[order], epochs[order]
+        self.policyholder_ids = list(policyholder_ids)
+        self._codes: Dict[str, int] = {policyholder_id: i for i, policyholder_id in enumerate(self.policyholder_ids)}
+        self.epochs = epochs
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(self.policyholder_ids)))))
+        self._base = int(self.epochs.min()) if len(self.epochs) else 0
+        self._span = int(self.epochs.max()) - self._base + 1 if len(self.epochs) else 1
+        self._keys = codes.astype(np.int64) * self._span + (self.epochs - self._base)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "ClaimTimeline":
+        """Build from a claims frame with policyholder_id and date_of_claim columns"""
+        codes, policyholder_ids = pd.factorize(frame["policyholder_id"])
+        # Truncated to whole seconds, as the original check did with split(".")
+        epochs = frame["date_of_claim"].to_numpy().astype("datetime64[s]").astype(np.int64)
+        return cls(list(policyholder_ids), codes.astype(np.int64), epochs)
+
+    def with_claims(self, policyholder_ids: List[str], epochs: np.ndarray) -> "ClaimTimeline":
+        """A copy with more claims, merged into place rather than re-sorting the whole book"""
+        new_ids = list(dict.fromkeys(p for p in policyholder_ids if p not in self._codes))
+        all_ids = self.policyholder_ids + new_ids
+        codes = {**self._codes, **{p: len(self.policyholder_ids) + i for i, p in enumerate(new_ids)}}
+        new_codes = np.fromiter((codes[p] for p in policyholder_ids), dtype=np.int64, count=len(policyholder_ids))
+        order = np.lexsort((epochs, new_codes))
+        new_codes, epochs = new_codes[order], epochs[order]
+        old_codes = np.repeat(np.arange(len(self.policyholder_ids), dtype=np.int64), np.diff(self.offsets))
+        # Both runs keyed the same way, so one binary search places every new claim
+        base = int(min(self.epochs.min(), epochs.min())) if len(self.epochs) else int(epochs.min())
+        span = int(max(self.epochs.max(), epochs.max())) - base + 1 if len(self.epochs) else int(epochs.max()) - base + 1
+        positions = np.searchsorted(old_codes * span + (self.epochs - base), new_codes * span + (epochs - base),
+                                    side="right")
+        return ClaimTimeline(all_ids, np.insert(old_codes, positions, new_codes),
+                             np.insert(self.epochs, positions, epochs), presorted=True)
+
+    def claim_epochs(self, policyholder_id: str) -> np.ndarray:
+        """Sorted claim timestamps of one policyholder"""
+        code = self._codes.get(policyholder_id)
+        if code is None:
+            return self.epochs[:0]
+        return self.epochs[self.offsets[code]:self.offsets[code + 1]]
+
+    def counts(self, policyholder_ids: List[str], after: Optional[int] = None,
+               until: Optional[int] = None) -> np.ndarray:
+        """Claims of each policyholder with after < timestamp <= until; unknown policyholders count zero"""
+        codes = np.fromiter((self._codes.get(p, -1) for p in policyholder_ids), dtype=np.int64,
+                            count=len(policyholder_ids))
+        known = codes >= 0
+        result = np.zeros(len(codes), dtype=np.int64)
+        if not known.any():
+            return result
+        codes = codes[known]
+        start = self.offsets[codes] if after is None else self._search(codes, after)
+        stop = self.offsets[codes + 1] if until is None else self._search(codes, until)
+        result[known] = np.maximum(stop - start, 0)
+        return result
+
+    def _search(self, codes: np.ndarray, bound: int) -> np.ndarray:
+        """Position after the last claim at or before bound within each policyholder's run"""
+        # Clipping keeps the probe inside the policyholder's key range, so it never
+        # lands in a neighbouring run
+        offset = min(max(bound - self._base, -1), self._span - 1)
+        return np.searchsorted(self._keys, codes * self._span + offset, side="right")
@@ -0,0 +1,61 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from .instrumentation import instrument_class
+from .report_service import ReportService
+from .risk_service import RiskService
+from .storage_backend import StorageBackend
+
+
+class DashboardSnapshot:
+    """Everything the Dashboard page shows, computed together for one data version"""
+
+    __slots__ = ("total_policyholders", "total_claims", "pending_claims", "high_risk_policyholders",
+                 "policy_types", "monthly_trend", "monthly_percentiles", "computed_at")
+
+    def __init__(self, total_policyholders: int, total_claims: int, pending_claims: int,
+                 high_risk_policyholders: int, policy_types: Dict[str, Dict], monthly_trend: List[Dict],
+                 monthly_percentiles: List[Dict]):
+        self.total_policyholders = total_policyholders
+        self.total_claims = total_claims
+        self.pending_claims = pending_claims
+        self.high_risk_policyholders = high_risk_policyholders
+        self.policy_types = policy_types
+        self.monthly_trend = monthly_trend
+        self.monthly_percentiles = monthly_percentiles
+        self.computed_at = datetime.now()
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@instrument_class
+class DashboardService:
+    def __init__(self, data_service: StorageBackend, risk_service: RiskService,
+                 report_service: ReportService):
+        self.data_service = data_service
+        self.risk_service = risk_service
+        self.report_service = report_service
+        self._snapshot: Optional[DashboardSnapshot] = None
+        self._snapshot_key: Optional[Tuple[int, date]] = None
+
+    def get_snapshot(self) -> DashboardSnapshot:
+        """Dashboard figures, rebuilt only when the data changes or the day rolls over.
+
+        The counts, policy-type breakdown, monthly trend and percentiles come from
+        indexes, aggregates and sketches the storage layer keeps up to date, so
+        the high-risk rule is the only pass over the claims. The day is part of
+        the cache key because that rule counts claims in a window ending now.
+        """
+        key = (self.data_service.version, date.today())
+        if self._snapshot is None or self._snapshot_key != key:
+            self._snapshot = DashboardSnapshot(
+                total_policyholders=self.data_service.count_policyholders(),
+                total_claims=self.data_service.count_claims(),
+                pending_claims=self.data_service.count_claims_by_status("Pending"),
+                high_risk_policyholders=self.risk_service.count_high_risk_policyholders(),
+                policy_types=self.risk_service.analyze_claims_by_policy_type(),
+                monthly_trend=self.report_service.generate_monthly_claims_report(),
+                monthly_percentiles=self.report_service.generate_monthly_percentiles_report()
+            )
+            self._snapshot_key = key
+        return self._snapshot
@@ -1,84 +1,1174 @@
+import atexit
+import functools
+import heapq
 import json
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+from datetime import date, datetime
+from enum import Enum
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Union
 import os
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+from .aggregates import AggregateStore
+from .claim_timeline import claim_epoch
+from .instrumentation import instrument_class, instrumented
+from .journal import Journal
+from .ordered_index import OrderedIndex
+from .quantile_sketch import QuantileSketch
+from .records import ClaimRecord, PolicyholderRecord, date_month, encode_bound, record_to_json
+from .snapshot import read_snapshot, snapshot_claims_frame, snapshot_records, write_snapshot
+from .storage_backend import (CLAIM_SORT_FIELDS, POLICYHOLDER_SORT_FIELDS, StorageBackend, date_key, follows,
+                              next_month)
+from .write_behind import WriteBehind
 
-class DataService:
-    def __init__(self, data_dir: str = "data"):
+
+# Recent mutation records kept in memory for changes_since
+CHANGE_FEED_SIZE = 10_000
+
+
+def _to_record(data: dict) -> dict:
+    """Convert datetimes and enums to the form they take on disk"""
+    record = {}
+    for key, value in data.items():
+        if isinstance(value, datetime):
+            value = str(value)
+        elif isinstance(value, Enum):
+            value = value.value
+        record[key] = value
+    return record
+
+
+def _load_records(f, record_class, id_field: str) -> Dict[str, Any]:
+    """Read a JSON file of records keyed by id, compacting each record as it is parsed"""
+    def hook(data: dict):
+        return record_class.from_dict(data) if id_field in data else data
+    loaded = json.load(f, object_hook=hook)
+    # Keyed by the record's own id string, so the parsed key copy can be freed
+    return {getattr(record, id_field): record for record in loaded.values()}
+
+
+def _write_json_object(f, data: Dict[str, Any], chunk_size: int = 10_000):
+    """Write a dict as a JSON object, encoding a chunk of items at a time"""
+    # json.dump falls back to the pure Python encoder; json.dumps on bounded
+    # chunks uses the C one without holding the whole document as one string
+    f.write("{")
+    items = iter(data.items())
+    first = True
+    while True:
+        chunk = {
+            key: value.to_dict() if isinstance(value, (ClaimRecord, PolicyholderRecord)) else value
+            for key, value in islice(items, chunk_size)
+        }
+        if not chunk:
+            break
+        if not first:
+            f.write(", ")
+        f.write(json.dumps(chunk, default=str)[1:-1])
+        first = False
+    f.write("}")
+
+
+def _atomic_write_json(path: str, data: Any):
+    """Write JSON to a temp file and rename it over the target"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        if isinstance(data, dict):
+            _write_json_object(f, data)
+        else:
+            json.dump(data, f, default=record_to_json)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _month_overlap(month: str, date_from: Optional[str], date_to: Optional[str]) -> Optional[bool]:
+    """True if a month lies wholly inside date_from <= date < date_to, False if only partly, None if not at all"""
+    # Every claim date in a month sorts between f"{month}-01" and next_month(month)
+    if (date_from is not None and next_month(month) <= date_from) or \
+            (date_to is not None and date_to <= f"{month}-01"):
+        return None
+    return (date_from is None or date_from <= f"{month}-01") and (date_to is None or next_month(month) <= date_to)
+
+
+def is_partitioned(data_dir: str) -> bool:
+    """Whether the claims in data_dir were split into month partitions"""
+    return os.path.exists(f"{data_dir}/claims/manifest.json")
+
+
+def _month_policy_key(month: str, policy_type: Optional[str]) -> Optional[str]:
+    """Key of a claim's month and policy type group; None leaves the claim out"""
+    return f"{month}/{policy_type}" if policy_type is not None else None
+
+
+def _policy_type_of_key(key: str) -> str:
+    return key.split("/", 1)[1]
+
+
+def _needs_all_claims(method):
+    """Read every claim partition before a method that uses the whole claim set"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._partial:
+            self._load_all_partitions()
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+@instrument_class
+class DataService(StorageBackend):
+    """JSON file storage backend holding the whole dataset in memory"""
+
+    def __init__(self, data_dir: str = "data", journal: bool = False,
+                 compact_threshold: int = 4 * 1024 * 1024, binary_snapshot: bool = False,
+                 write_behind: bool = False, flush_interval_ms: int = 200, flush_max_changes: int = 1000,
+                 partitioned: bool = False):
+        if partitioned and binary_snapshot:
+            raise ValueError("The binary snapshot mirrors claims.json and cannot be used with partitioned storage")
+        if not partitioned and is_partitioned(data_dir):
+            raise ValueError(f"The claims in {data_dir} are partitioned; open them with partitioned=True")
         self.data_dir = data_dir
-        self.policyholders: Dict[str, dict] = {}
-        self.claims: Dict[str, dict] = {}
+        # Compact records (see services/records.py); getters hand out dict copies
+        self.policyholders: Dict[str, PolicyholderRecord] = {}
+        self.claims: Dict[str, ClaimRecord] = {}
+        # Secondary indexes: key -> ordered set (dict with None values) of claim ids
+        self._claims_by_policyholder: Dict[str, Dict[str, None]] = {}
+        self._claims_by_status: Dict[str, Dict[str, None]] = {}
+        self._claims_by_month: Dict[str, Dict[str, None]] = {}
+        # Ordered indexes for top-N and range lookups, built on first use; dates compare as ISO strings
+        self._claims_by_amount: Optional[OrderedIndex] = None
+        self._claims_by_date: Optional[OrderedIndex] = None
+        self._status_by_date: Dict[str, OrderedIndex] = {}
+        # Materialized report aggregates, kept current by every mutation
+        self.monthly_aggregates = AggregateStore()
+        self.policy_type_aggregates = AggregateStore()
+        # Partitioned storage only: aggregates per "YYYY-MM/policy type", saved in the manifest
+        # so policy type totals need no claim files; None until known
+        self.month_policy_aggregates: Optional[AggregateStore] = None
+        # Bumped by every load and mutation; derived views are cached against it
+        self.version = 0
+        # Sequence number of the latest mutation and the most recent mutation records.
+        # With the journal, numbers carry across restarts and the log holds the older records
+        self.sequence = 0
+        self._changes: deque = deque(maxlen=CHANGE_FEED_SIZE)
+        self._journal_offset = 0
+        self._claims_frame: Optional[pd.DataFrame] = None
+        self._claims_frame_version = -1
+        self.compact_threshold = compact_threshold
+        self.journal = Journal(f"{data_dir}/journal.log") if journal else None
+        # Columnar copy of the JSON files, read instead of parsing them at startup; the records
+        # are still built in memory, so it saves load time only (see services/snapshot.py)
+        self.snapshot_path = f"{data_dir}/snapshot" if binary_snapshot else None
+        # Month-partitioned claims (claims/YYYY-MM.json plus manifest.json). Partitions are
+        # read on first use; until all are read (_partial) the aggregates come from the
+        # manifest, mutations touch only their claim's month (found through index.json),
+        # and saves rewrite only the months changed since the last save
+        self.partition_dir = f"{data_dir}/claims" if partitioned else None
+        self._partitions: Dict[str, Dict[str, dict]] = {}
+        self._partial = False
+        self._dirty_months: set = set()
+        self._claim_months: Optional[Dict[str, str]] = None
+        self._claim_ids_dirty = False
+        self._lock = threading.RLock()
+        self._signature: Tuple = ()
         self._ensure_data_dir()
         self._load_data()
+        # Write-behind mode: mutations return once applied in memory and a background
+        # thread persists them in groups (see services/write_behind.py)
+        self._writer: Optional[WriteBehind] = None
+        if write_behind:
+            self._writer = WriteBehind(self._persist, flush_interval_ms / 1000, flush_max_changes)
+            atexit.register(self._writer.close)
 
     def _ensure_data_dir(self):
         """Ensure the data directory exists"""
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
 
+    @instrumented
     def _load_data(self):
-        """Load data from JSON files"""
+        """Load data from the binary snapshot or JSON files and replay the journal, if any"""
+        self.policyholders = {}
+        self.claims = {}
+        self._partitions = {}
+        self._partial = False
+        self._dirty_months = set()
+        self._claim_months = None
+        self._claim_ids_dirty = False
+        snapshot = None
+        manifest = None
+        replayed = 0
+        self._changes.clear()
+        # The journal numbers the changes; without one a reload is a change no delta describes
+        self.sequence = 0 if self.journal else self.sequence + 1
         try:
-            if os.path.exists(f"{self.data_dir}/policyholders.json"):
-                with open(f"{self.data_dir}/policyholders.json", "r") as f:
-                    self.policyholders = json.load(f)
-            if os.path.exists(f"{self.data_dir}/claims.json"):
-                with open(f"{self.data_dir}/claims.json", "r") as f:
-                    self.claims = json.load(f)
+            if self.snapshot_path:
+                snapshot = read_snapshot(self.snapshot_path, self._json_signature())
+            if snapshot:
+                self.policyholders, self.claims = snapshot_records(snapshot)
+            else:
+                if os.path.exists(f"{self.data_dir}/policyholders.json"):
+                    with open(f"{self.data_dir}/policyholders.json", "r") as f:
+                        self.policyholders = _load_records(f, PolicyholderRecord, "policyholder_id")
+                if self.partition_dir and os.path.exists(self._manifest_path()):
+                    with open(self._manifest_path(), "r") as f:
+                        manifest = json.load(f)
+                    self._partial = True
+                elif os.path.exists(f"{self.data_dir}/claims.json"):
+                    with open(f"{self.data_dir}/claims.json", "r") as f:
+                        self.claims = _load_records(f, ClaimRecord, "claim_id")
+            self._rebuild_indexes()
+            if manifest is not None:
+                self.monthly_aggregates = AggregateStore.from_dict(manifest["months"])
+                # Manifests written before policy type totals were kept leave them unknown
+                policy_types = manifest.get("policy_types")
+                self.month_policy_aggregates = AggregateStore.from_dict(policy_types) if policy_types is not None else None
+            if self.journal:
+                records, self._journal_offset = self.journal.read_from(0)
+                replayed = sum(record["op"] != "checkpoint" for record in records)
+                for record in records:
+                    self._apply(record)
         except Exception as e:
             print(f"Error loading data: {e}")
+        self.version += 1
+        if snapshot and not replayed:
+            # Nothing changed since the snapshot, so its columns are the claims frame
+            self._claims_frame = snapshot_claims_frame(snapshot, self.claims)
+            self._claims_frame_version = self.version
+        elif self.snapshot_path and not snapshot and self.claims:
+            self._write_snapshot()
+        elif self.partition_dir and manifest is None and self.claims:
+            # First start with partitioning: split claims.json into month files.
+            # The original goes once the split is on disk, so nothing reads it stale
+            self._dirty_months = set(self._claims_by_month)
+            self._claim_ids_dirty = True
+            if self._save_data():
+                os.remove(f"{self.data_dir}/claims.json")
+        self._signature = self._storage_signature()
+
+    def _manifest_path(self) -> str:
+        return f"{self.partition_dir}/manifest.json"
+
+    def _index_path(self) -> str:
+        return f"{self.partition_dir}/index.json"
+
+    def _claim_month_index(self) -> Optional[Dict[str, str]]:
+        """Month of every claim while partitions are loading lazily, read on first use.
+
+        None for partitions saved before the index was kept.
+        """
+        if self._claim_months is None and os.path.exists(self._index_path()):
+            with open(self._index_path(), "r") as f:
+                self._claim_months = json.load(f)
+        return self._claim_months
+
+    def _find_claim(self, claim_id: str) -> Optional[ClaimRecord]:
+        """A claim record, reading only its month partition while loading lazily"""
+        with self._lock:
+            if self._partial:
+                claim_months = self._claim_month_index()
+                if claim_months is not None:
+                    month = claim_months.get(claim_id)
+                    return self._month_partition(month).get(claim_id) if month else None
+                self._load_all_partitions()
+            return self.claims.get(claim_id)
 
-    def _save_data(self):
-        """Save data to JSON files"""
+    def _read_partition(self, month: str) -> Dict[str, ClaimRecord]:
+        """Claims stored in one month partition file"""
+        path = f"{self.partition_dir}/{month}.json"
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r") as f:
+            return _load_records(f, ClaimRecord, "claim_id")
+
+    def _month_partition(self, month: str) -> Dict[str, ClaimRecord]:
+        """One month's claims while partitions are loading lazily, read at most once"""
+        with self._lock:
+            partition = self._partitions.get(month)
+            if partition is None:
+                known = month in self.monthly_aggregates.groups
+                partition = self._partitions[month] = self._read_partition(month) if known else {}
+            return partition
+
+    @instrumented
+    def _load_all_partitions(self):
+        """Read every partition not read yet and index the full claim set"""
+        with self._lock:
+            if not self._partial:
+                return
+            claims = {}
+            for month in sorted(self.monthly_aggregates.groups):
+                claims.update(self._month_partition(month))
+            self.claims = claims
+            self._partitions = {}
+            self._partial = False
+            self._claim_months = None
+            # Partitions saved before the index was kept get one with the next save
+            self._claim_ids_dirty = self._claim_ids_dirty or not os.path.exists(self._index_path())
+            self._rebuild_indexes()
+
+    def _save_partitions(self):
+        """Rewrite the month files changed since the last save, then the manifest"""
+        os.makedirs(self.partition_dir, exist_ok=True)
+        for month in sorted(self._dirty_months):
+            path = f"{self.partition_dir}/{month}.json"
+            claims = self._month_claims(month)
+            if claims:
+                _atomic_write_json(path, {claim.claim_id: claim for claim in claims})
+            elif os.path.exists(path):
+                os.remove(path)
+        if self._claim_ids_dirty:
+            if self._partial:
+                claim_months = self._claim_months
+            else:
+                claim_months = {claim_id: month for month, claim_ids in self._claims_by_month.items()
+                                for claim_id in claim_ids}
+            _atomic_write_json(self._index_path(), claim_months)
+        # Written last, so the manifest never describes month files that are not on disk yet
+        manifest = {"months": self.monthly_aggregates.to_dict()}
+        if self.month_policy_aggregates is not None:
+            manifest["policy_types"] = self.month_policy_aggregates.to_dict()
+        _atomic_write_json(self._manifest_path(), manifest)
+        self._dirty_months = set()
+        self._claim_ids_dirty = False
+
+    def _write_snapshot(self):
+        """Mirror the JSON files into the binary snapshot"""
         try:
-            with open(f"{self.data_dir}/policyholders.json", "w") as f:
-                json.dump(self.policyholders, f, default=str)
-            with open(f"{self.data_dir}/claims.json", "w") as f:
-                json.dump(self.claims, f, default=str)
+            write_snapshot(self.snapshot_path, self.policyholders, self.claims, self._json_signature())
+        except Exception as e:
+            print(f"Error writing snapshot: {e}")
+
+    def _json_signature(self) -> List:
+        """Modification time and size of the two JSON files"""
+        return self._file_signature([f"{self.data_dir}/policyholders.json", f"{self.data_dir}/claims.json"])
+
+    def _storage_signature(self) -> Tuple:
+        """Modification time and size of every file backing the store"""
+        claims_path = self._manifest_path() if self.partition_dir else f"{self.data_dir}/claims.json"
+        paths = [f"{self.data_dir}/policyholders.json", claims_path]
+        if self.journal:
+            paths.append(self.journal.path)
+        return tuple(self._file_signature(paths))
+
+    @staticmethod
+    def _file_signature(paths: List[str]) -> List:
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return signature
+
+    def reload_if_changed(self) -> bool:
+        """Reload from disk if another writer changed the files since we last saw them"""
+        with self._lock:
+            if self._storage_signature() == self._signature:
+                return False
+        # Queued changes would be lost by the reload, and a group write in flight
+        # looks like an outside change until it finishes
+        self.flush()
+        with self._lock:
+            signature = self._storage_signature()
+            if signature == self._signature:
+                return False
+            if not self._apply_journal_tail(signature):
+                self._load_data()
+            return True
+
+    def _apply_journal_tail(self, signature: Tuple) -> bool:
+        """Catch up by applying only what another writer appended to the journal.
+
+        Works when the JSON files are unchanged and the new records continue our
+        sequence; anything else (a compaction, a second writer) needs a full load.
+        """
+        if not self.journal or signature[:-1] != self._signature[:-1]:
+            return False
+        if self.journal.size() < self._journal_offset:
+            return False
+        records, offset = self.journal.read_from(self._journal_offset)
+        if not follows(records, self.sequence):
+            return False
+        self.apply_changes(records)
+        self._journal_offset = offset
+        self._signature = signature
+        return True
+
+    def changes_since(self, seq: int) -> Optional[List[dict]]:
+        """Mutation records numbered above seq, oldest first, or None if some are no longer kept.
+
+        Recent records come from memory and older ones from the journal, back to
+        its last compaction. The records are shared, so treat them as read-only.
+        """
+        with self._lock:
+            if seq > self.sequence:
+                return None
+            kept = self._changes[0]["seq"] if self._changes else self.sequence + 1
+            changes = list(islice(self._changes, max(seq + 1 - kept, 0), None))
+            if seq + 1 < kept and self.journal:
+                older = [
+                    record for record in self.journal.read_from(0)[0]
+                    if record["op"] != "checkpoint" and seq < record.get("seq", 0) < kept
+                ]
+                changes = older + changes
+            return changes if follows(changes, seq) and len(changes) == self.sequence - seq else None
+
+    def apply_changes(self, changes: List[dict]) -> int:
+        """Apply another store's changes_since records to this copy; returns how many were new.
+
+        The changes update the in-memory data, indexes and aggregates but are not
+        written out, as the store they came from has already persisted them.
+        """
+        with self._lock:
+            changes = [record for record in changes if record["seq"] > self.sequence]
+            if not follows(changes, self.sequence):
+                raise ValueError(f"Changes do not continue from sequence number {self.sequence}")
+            for record in changes:
+                self._apply(dict(record))
+            return len(changes)
+
+    @instrumented
+    def _save_data(self) -> bool:
+        """Save data to JSON files; False if they could not be written"""
+        try:
+            _atomic_write_json(f"{self.data_dir}/policyholders.json", self.policyholders)
+            if self.partition_dir:
+                self._save_partitions()
+            else:
+                _atomic_write_json(f"{self.data_dir}/claims.json", self.claims)
         except Exception as e:
             print(f"Error saving data: {e}")
+            return False
+        if self.snapshot_path:
+            self._write_snapshot()
+        return True
+
+    def _rebuild_indexes(self):
+        """Rebuild all secondary indexes from the claims dict"""
+        self._claims_by_policyholder = {}
+        self._claims_by_status = {}
+        self._claims_by_month = {}
+        self._claims_by_amount = None
+        self._claims_by_date = None
+        self._status_by_date = {}
+        by_policyholder, by_status = [], []
+        months, amounts, pending, policy_types = [], [], [], []
+        policy_type_of = {p.policyholder_id: p.policy_type for p in self.policyholders.values()}
+        for claim in self.claims.values():
+            status = claim.status
+            by_policyholder.append(claim.policyholder_id)
+            by_status.append(status)
+            months.append(date_month(claim.date_value))
+            amounts.append(float(claim.claim_amount))
+            pending.append(status == "Pending")
+            policy_types.append(policy_type_of.get(claim.policyholder_id))
+        for index, keys in ((self._claims_by_policyholder, by_policyholder),
+                            (self._claims_by_status, by_status),
+                            (self._claims_by_month, months)):
+            for key, claim_id in zip(keys, self.claims):
+                bucket = index.get(key)
+                if bucket is None:
+                    bucket = index[key] = {}
+                bucket[claim_id] = None
+        # Aggregates are built in one grouped pass rather than claim by claim
+        self.monthly_aggregates = AggregateStore.from_columns(months, amounts, pending)
+        self.policy_type_aggregates = AggregateStore.from_columns(policy_types, amounts, pending)
+        if self.partition_dir:
+            self.month_policy_aggregates = AggregateStore.from_columns(
+                [_month_policy_key(month, policy_type) for month, policy_type in zip(months, policy_types)],
+                amounts, pending
+            )
+
+    def _ordered_indexes(self):
+        """Build the amount and date ordered indexes if this is their first use"""
+        with self._lock:
+            if self._claims_by_amount is not None:
+                return
+            claims = self.claims.values()
+            self._claims_by_amount = OrderedIndex((float(c.claim_amount), c.claim_id) for c in claims)
+            self._claims_by_date = OrderedIndex((str(c.date_of_claim), c.claim_id) for c in claims)
+            # Splitting the date order by status leaves each part already sorted
+            by_status: Dict[str, list] = {}
+            for entry in self._claims_by_date.entries():
+                by_status.setdefault(self.claims[entry[1]].status, []).append(entry)
+            self._status_by_date = {status: OrderedIndex(entries) for status, entries in by_status.items()}
+
+    def _claim_policy_type(self, claim: ClaimRecord) -> Optional[str]:
+        """Policy type of the claim's policyholder, if the policyholder is known"""
+        policyholder = self.policyholders.get(claim.policyholder_id)
+        return policyholder.policy_type if policyholder else None
+
+    def _index_claim(self, claim: ClaimRecord):
+        """Add a claim to the secondary indexes and aggregates"""
+        claim_id = claim.claim_id
+        month = claim.month()
+        self._claims_by_policyholder.setdefault(claim.policyholder_id, {})[claim_id] = None
+        self._claims_by_status.setdefault(claim.status, {})[claim_id] = None
+        self._claims_by_month.setdefault(month, {})[claim_id] = None
+        if self.partition_dir:
+            self._dirty_months.add(month)
+            self._claim_ids_dirty = True
+
+        amount = float(claim.claim_amount)
+        if self._claims_by_amount is not None:
+            claim_date = str(claim.date_of_claim)
+            self._claims_by_amount.add(amount, claim_id)
+            self._claims_by_date.add(claim_date, claim_id)
+            self._status_by_date.setdefault(claim.status, OrderedIndex()).add(claim_date, claim_id)
+
+        policy_type = self._claim_policy_type(claim)
+        self._add_to_month(claim, policy_type)
+        if policy_type is not None:
+            self.policy_type_aggregates.add(policy_type, amount, claim.status == "Pending")
+
+    def _unindex_claim(self, claim: ClaimRecord):
+        """Remove a claim from the secondary indexes and aggregates"""
+        claim_id = claim.claim_id
+        month = claim.month()
+        self._claims_by_policyholder.get(claim.policyholder_id, {}).pop(claim_id, None)
+        self._claims_by_status.get(claim.status, {}).pop(claim_id, None)
+        self._claims_by_month.get(month, {}).pop(claim_id, None)
+        if self.partition_dir:
+            self._dirty_months.add(month)
+
+        amount = float(claim.claim_amount)
+        if self._claims_by_amount is not None:
+            claim_date = str(claim.date_of_claim)
+            self._claims_by_amount.remove(amount, claim_id)
+            self._claims_by_date.remove(claim_date, claim_id)
+            if claim.status in self._status_by_date:
+                self._status_by_date[claim.status].remove(claim_date, claim_id)
+
+        policy_type = self._claim_policy_type(claim)
+        self._remove_from_month(claim, policy_type)
+        if policy_type is not None:
+            self._remove_from_policy_type(policy_type, claim)
+
+    def _add_to_month(self, claim: ClaimRecord, policy_type: Optional[str]):
+        """Count a claim towards its month aggregates"""
+        month, amount, pending = claim.month(), float(claim.claim_amount), claim.status == "Pending"
+        self.monthly_aggregates.add(month, amount, pending)
+        if self.month_policy_aggregates is not None and policy_type is not None:
+            self.month_policy_aggregates.add(_month_policy_key(month, policy_type), amount, pending)
+
+    def _remove_from_month(self, claim: ClaimRecord, policy_type: Optional[str]):
+        """Take a claim out of its month aggregates, once it is gone from the month's claims"""
+        month, amount, pending = claim.month(), float(claim.claim_amount), claim.status == "Pending"
+        if self.monthly_aggregates.remove(month, amount, pending):
+            self.monthly_aggregates.recompute_max(month, (float(c.claim_amount) for c in self._month_claims(month)))
+        if self.month_policy_aggregates is not None and policy_type is not None:
+            key = _month_policy_key(month, policy_type)
+            if self.month_policy_aggregates.remove(key, amount, pending):
+                self.month_policy_aggregates.recompute_max(key, (
+                    float(c.claim_amount) for c in self._month_claims(month)
+                    if self._claim_policy_type(c) == policy_type
+                ))
+
+    def _move_month_policy_type(self, claim: ClaimRecord, old_type: Optional[str], new_type: str):
+        """Move a claim between month and policy type groups when its policyholder changes type"""
+        month, amount, pending = claim.month(), float(claim.claim_amount), claim.status == "Pending"
+        if old_type is not None:
+            key = _month_policy_key(month, old_type)
+            # The policyholder already has the new type, so the claim no longer matches old_type
+            if self.month_policy_aggregates.remove(key, amount, pending):
+                self.month_policy_aggregates.recompute_max(key, (
+                    float(c.claim_amount) for c in self._month_claims(month)
+                    if self._claim_policy_type(c) == old_type
+                ))
+        self.month_policy_aggregates.add(_month_policy_key(month, new_type), amount, pending)
+
+    def _update_month_pending(self, claim: ClaimRecord, policy_type: Optional[str], delta: int):
+        """Adjust a claim's month aggregates after a status change"""
+        month = claim.month()
+        self.monthly_aggregates.update_pending(month, delta)
+        if self.month_policy_aggregates is not None and policy_type is not None:
+            self.month_policy_aggregates.update_pending(_month_policy_key(month, policy_type), delta)
+
+    def _remove_from_policy_type(self, policy_type: str, claim: ClaimRecord):
+        """Take a claim out of its policy type aggregate"""
+        amount = float(claim.claim_amount)
+        if self.policy_type_aggregates.remove(policy_type, amount, claim.status == "Pending"):
+            self.policy_type_aggregates.recompute_max(policy_type, (
+                float(c.claim_amount) for c in self.claims.values()
+                if c is not claim and self._claim_policy_type(c) == policy_type
+            ))
+
+    def _apply(self, record: dict):
+        """Apply a single mutation record to the in-memory store"""
+        op = record["op"]
+        if op == "checkpoint":
+            # First line of a compacted journal: the sequence number the JSON files are at
+            self.sequence = max(self.sequence, record["seq"])
+            return
+        # Journals written before records were numbered continue from the current number
+        seq = record.setdefault("seq", self.sequence + 1)
+        if seq > self.sequence:
+            self.sequence = seq
+            self._changes.append(record)
+        self.version += 1
+        if self._partial and self._apply_to_partition(op, record):
+            return
+        if op == "add_policyholder":
+            policyholder = PolicyholderRecord.from_dict(record["data"])
+            previous = self.policyholders.get(policyholder.policyholder_id)
+            old_type = previous.policy_type if previous else None
+            self.policyholders[policyholder.policyholder_id] = policyholder
+            if old_type != policyholder.policy_type:
+                # Existing claims of this policyholder move to the new policy type
+                for claim_id in self._claims_by_policyholder.get(policyholder.policyholder_id, {}):
+                    claim = self.claims[claim_id]
+                    if old_type is not None:
+                        self._remove_from_policy_type(old_type, claim)
+                    self.policy_type_aggregates.add(
+                        policyholder.policy_type, float(claim.claim_amount), claim.status == "Pending"
+                    )
+                    if self.month_policy_aggregates is not None:
+                        self._move_month_policy_type(claim, old_type, policyholder.policy_type)
+        elif op == "add_claim":
+            claim = ClaimRecord.from_dict(record["data"])
+            previous = self.claims.get(claim.claim_id)
+            if previous is not None:
+                self._unindex_claim(previous)
+            self.claims[claim.claim_id] = claim
+            self._index_claim(claim)
+        elif op == "update_claim_status":
+            claim = self.claims.get(record["claim_id"])
+            if claim is not None:
+                claim_date = str(claim.date_of_claim)
+                self._claims_by_status.get(claim.status, {}).pop(claim.claim_id, None)
+                if claim.status in self._status_by_date:
+                    self._status_by_date[claim.status].remove(claim_date, claim.claim_id)
+                pending_delta = (record["status"] == "Pending") - (claim.status == "Pending")
+                claim.status = record["status"]
+                self._claims_by_status.setdefault(claim.status, {})[claim.claim_id] = None
+                if self._claims_by_date is not None:
+                    self._status_by_date.setdefault(claim.status, OrderedIndex()).add(claim_date, claim.claim_id)
+                if self.partition_dir:
+                    self._dirty_months.add(claim.month())
+                if pending_delta:
+                    policy_type = self._claim_policy_type(claim)
+                    self._update_month_pending(claim, policy_type, pending_delta)
+                    if policy_type is not None:
+                        self.policy_type_aggregates.update_pending(policy_type, pending_delta)
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
+
+    def _apply_to_partition(self, op: str, record: dict) -> bool:
+        """Apply a mutation while partitions are loading lazily, reading only its claim's month.
+
+        Returns False when the mutation needs every claim (a policyholder changing
+        policy type, or partitions saved without the index). All partitions are
+        loaded by then and the caller applies it as usual. A claim filed before
+        its policyholder existed joins the policy type totals on the next full load.
+        """
+        if op == "add_policyholder":
+            policyholder = PolicyholderRecord.from_dict(record["data"])
+            previous = self.policyholders.get(policyholder.policyholder_id)
+            if previous is not None and previous.policy_type != policyholder.policy_type:
+                self._load_all_partitions()
+                return False
+            self.policyholders[policyholder.policyholder_id] = policyholder
+            return True
+        claim_months = self._claim_month_index()
+        if claim_months is None or self.month_policy_aggregates is None:
+            self._load_all_partitions()
+            return False
+        if op == "add_claim":
+            claim = ClaimRecord.from_dict(record["data"])
+            previous_month = claim_months.get(claim.claim_id)
+            if previous_month is not None:
+                previous = self._month_partition(previous_month).pop(claim.claim_id, None)
+                if previous is not None:
+                    self._dirty_months.add(previous_month)
+                    self._remove_from_month(previous, self._claim_policy_type(previous))
+            month = claim.month()
+            self._month_partition(month)[claim.claim_id] = claim
+            claim_months[claim.claim_id] = month
+            self._claim_ids_dirty = True
+            self._dirty_months.add(month)
+            self._add_to_month(claim, self._claim_policy_type(claim))
+        elif op == "update_claim_status":
+            claim = self._find_claim(record["claim_id"])
+            if claim is not None:
+                pending_delta = (record["status"] == "Pending") - (claim.status == "Pending")
+                claim.status = record["status"]
+                self._dirty_months.add(claim.month())
+                if pending_delta:
+                    self._update_month_pending(claim, self._claim_policy_type(claim), pending_delta)
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
+        return True
+
+    def _commit(self, record: dict):
+        """Apply a mutation and persist it"""
+        self._commit_many([record])
+
+    def _commit_many(self, records: List[dict]):
+        """Apply a batch of mutations and persist them together"""
+        # Catch up with other writers first, so our records follow theirs
+        self.reload_if_changed()
+        with self._lock:
+            for record in records:
+                record["seq"] = self.sequence + 1
+                self._apply(record)
+            if self._writer is None:
+                self._persist(records)
+            else:
+                # Queued under the lock so records are written in the order they were applied
+                self._writer.submit(records)
+
+    def _persist(self, records: List[dict]):
+        """Make applied mutation records durable"""
+        with self._lock:
+            # Files another writer changed since we last looked must still trigger a reload
+            changed_elsewhere = self._storage_signature() != self._signature
+            # Failures raise, so the write-behind thread keeps the records for a retry
+            if self.journal is None:
+                if not self._save_data():
+                    raise OSError(f"Could not save data to {self.data_dir}")
+            else:
+                self.journal.append_many(records)
+                # A compaction now would save state that lacks the other writer's
+                # records and then drop them from the journal; the reload comes first
+                if not changed_elsewhere and self.journal.size() > self.compact_threshold:
+                    try:
+                        self.compact()
+                    except Exception as e:
+                        # The records are in the journal already; compaction is retried next time
+                        print(f"Error compacting journal: {e}")
+            if not changed_elsewhere:
+                self._signature = self._storage_signature()
+                if self.journal:
+                    self._journal_offset = self.journal.size()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued write-behind changes are durable; False if timeout expired or a write failed"""
+        if self._writer is None:
+            return True
+        return self._writer.flush(timeout)
+
+    def close(self) -> bool:
+        """Write any queued changes and stop the write-behind thread; False if some were lost"""
+        if self._writer is None:
+            return True
+        atexit.unregister(self._writer.close)
+        return self._writer.close()
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot and truncate it.
+
+        Replaying a record twice is harmless, so a crash between the snapshot
+        rename and the truncate only costs a slightly longer next startup. The
+        journal is kept whenever the JSON files could not be written.
+        """
+        with self._lock:
+            if self._save_data() and self.journal:
+                self.journal.truncate({"op": "checkpoint", "seq": self.sequence})
 
     def add_policyholder(self, policyholder_data: dict) -> str:
         """Add a new policyholder"""
         policyholder_id = policyholder_data["policyholder_id"]
-        self.policyholders[policyholder_id] = policyholder_data
-        self._save_data()
+        self._commit({"op": "add_policyholder", "data": _to_record(policyholder_data)})
         return policyholder_id
 
+    def add_policyholders(self, policyholders: List[dict]) -> List[str]:
+        """Add a batch of policyholders with a single persist"""
+        if policyholders:
+            self._commit_many([{"op": "add_policyholder", "data": _to_record(p)} for p in policyholders])
+        return [p["policyholder_id"] for p in policyholders]
+
     def get_policyholder(self, policyholder_id: str) -> Optional[dict]:
         """Get policyholder by ID"""
-        return self.policyholders.get(policyholder_id)
+        policyholder = self.policyholders.get(policyholder_id)
+        return policyholder.to_dict() if policyholder else None
 
     def get_all_policyholders(self) -> List[dict]:
         """Get all policyholders"""
-        return list(self.policyholders.values())
+        # list() copies the values in one step, so a concurrent write cannot interrupt it
+        return [policyholder.to_dict() for policyholder in list(self.policyholders.values())]
+
+    def count_policyholders(self) -> int:
+        """Count policyholders"""
+        return len(self.policyholders)
 
     def add_claim(self, claim_data: dict) -> str:
         """Add a new claim"""
         claim_id = claim_data["claim_id"]
-        self.claims[claim_id] = claim_data
-        self._save_data()
+        self._commit({"op": "add_claim", "data": _to_record(claim_data)})
         return claim_id
 
+    @_needs_all_claims
+    def get_claims_frame(self) -> pd.DataFrame:
+        """Columnar view of all claims joined with their policy type.
+
+        Dates are parsed to datetime64 and status/policy_type are categoricals.
+        The frame is built once per data version and shared by all callers, so
+        treat it as read-only.
+        """
+        if self._claims_frame_version != self.version:
+            claims = list(self.claims.values())
+            date_values = [claim.date_value for claim in claims]
+            if all(type(value) is int for value in date_values):
+                # Epoch microseconds convert without parsing a string per claim
+                dates = pd.to_datetime(pd.Series(date_values, dtype="int64"), unit="us")
+            else:
+                dates = pd.to_datetime(pd.Series([str(claim.date_of_claim) for claim in claims]), format="ISO8601")
+            frame = pd.DataFrame({
+                "claim_id": [claim.claim_id for claim in claims],
+                "policyholder_id": [claim.policyholder_id for claim in claims],
+                "claim_amount": pd.Series([claim.claim_amount for claim in claims], dtype="float64"),
+                "reason": [claim.reason for claim in claims],
+                "status": pd.Series([claim.status for claim in claims], dtype="category"),
+                "date_of_claim": dates,
+                "policy_type": pd.Series([self._claim_policy_type(claim) for claim in claims], dtype="category")
+            })
+            self._claims_frame = frame
+            self._claims_frame_version = self.version
+        return self._claims_frame
+
+    def add_claims(self, claims: List[dict]) -> List[str]:
+        """Add a batch of claims with a single persist"""
+        if claims:
+            self._commit_many([{"op": "add_claim", "data": _to_record(c)} for c in claims])
+        return [c["claim_id"] for c in claims]
+
     def get_claim(self, claim_id: str) -> Optional[dict]:
         """Get claim by ID"""
-        return self.claims.get(claim_id)
+        claim = self._find_claim(claim_id)
+        return claim.to_dict() if claim else None
 
+    @_needs_all_claims
     def get_all_claims(self) -> List[dict]:
         """Get all claims"""
-        return list(self.claims.values())
+        # list() copies the values in one step, so a concurrent write cannot interrupt it
+        return [claim.to_dict() for claim in list(self.claims.values())]
+
+    def count_claims(self) -> int:
+        """Count claims"""
+        if self._partial:
+            return sum(group.count for group in self.monthly_aggregates.groups.values())
+        return len(self.claims)
 
     def update_claim_status(self, claim_id: str, status: str) -> bool:
         """Update claim status"""
-        if claim_id in self.claims:
-            self.claims[claim_id]["status"] = status
-            self._save_data()
+        if self._find_claim(claim_id) is not None:
+            if isinstance(status, Enum):
+                status = status.value
+            self._commit({"op": "update_claim_status", "claim_id": claim_id, "status": status})
             return True
         return False
 
+    @_needs_all_claims
     def get_policyholder_claims(self, policyholder_id: str) -> List[dict]:
         """Get all claims for a policyholder"""
+        with self._lock:
+            claims = [self.claims[claim_id] for claim_id in self._claims_by_policyholder.get(policyholder_id, {})]
+        return [claim.to_dict() for claim in claims]
+
+    @_needs_all_claims
+    def get_policyholder_claim_epochs(self, policyholder_id: str) -> np.ndarray:
+        """Sorted whole-second epoch timestamps of a policyholder's claims, read from the records"""
+        with self._lock:
+            date_values = [self.claims[claim_id].date_value
+                           for claim_id in self._claims_by_policyholder.get(policyholder_id, {})]
+        return np.sort(np.array([claim_epoch(value) for value in date_values], dtype=np.int64))
+
+    @_needs_all_claims
+    def get_claims_by_status(self, status: str) -> List[dict]:
+        """Get all claims with the given status"""
+        with self._lock:
+            claims = [self.claims[claim_id] for claim_id in self._claims_by_status.get(status, {})]
+        return [claim.to_dict() for claim in claims]
+
+    def count_claims_by_status(self, status: str) -> int:
+        """Count claims with the given status"""
+        with self._lock:
+            if self._partial and status == "Pending":
+                # The manifest keeps pending counts, so this one needs no claim files
+                return sum(group.pending for group in self.monthly_aggregates.groups.values())
+            if self._partial:
+                self._load_all_partitions()
+            return len(self._claims_by_status.get(status, {}))
+
+    def get_monthly_aggregates(self, date_from: Optional[Union[date, str]] = None,
+                               date_to: Optional[Union[date, str]] = None) -> Dict[str, dict]:
+        """Claim count, total, max and pending count per month, ordered by month.
+
+        Months wholly inside the date range come straight from the aggregates;
+        only the months at its edges are read claim by claim.
+        """
+        date_from, date_to = date_key(date_from), date_key(date_to)
+        monthly = {}
+        with self._lock:
+            for month, group in sorted(self.monthly_aggregates.to_dict().items()):
+                overlap = _month_overlap(month, date_from, date_to)
+                if overlap is None:
+                    continue
+                if overlap:
+                    monthly[month] = group
+                    continue
+                edge = AggregateStore()
+                for claim in self._month_claims_in_range(month, date_from, date_to):
+                    edge.add(month, float(claim.claim_amount), claim.status == "Pending")
+                if month in edge.groups:
+                    monthly[month] = edge.groups[month].to_dict()
+        return monthly
+
+    def _month_claims_in_range(self, month: str, date_from: Optional[str], date_to: Optional[str]) -> List[ClaimRecord]:
+        """Claim records of a month with date_from <= date_of_claim < date_to"""
         return [
-            claim for claim in self.claims.values()
-            if claim["policyholder_id"] == policyholder_id
-        ] 
\ No newline at end of file
+            claim for claim in self._month_claims(month)
+            if (date_from is None or str(claim.date_of_claim) >= date_from)
+            and (date_to is None or str(claim.date_of_claim) < date_to)
+        ]
+
+    def get_monthly_amount_sketches(self, date_from: Optional[Union[date, str]] = None,
+                                    date_to: Optional[Union[date, str]] = None) -> Dict[str, QuantileSketch]:
+        """Claim amount sketch per month, ordered by month.
+
+        Months wholly inside the date range use the sketches kept up to date by
+        every mutation; only the months at its edges are read claim by claim.
+        """
+        date_from, date_to = date_key(date_from), date_key(date_to)
+        sketches = {}
+        with self._lock:
+            for month in sorted(self.monthly_aggregates.groups):
+                overlap = _month_overlap(month, date_from, date_to)
+                if overlap is None:
+                    continue
+                if overlap:
+                    group = self.monthly_aggregates.groups[month]
+                    if group.sketch is None:
+                        self.monthly_aggregates.rebuild_sketch(
+                            month, (claim.claim_amount for claim in self._month_claims(month))
+                        )
+                    # A copy, as later mutations keep updating the kept sketch
+                    sketches[month] = group.sketch.copy()
+                    continue
+                amounts = [claim.claim_amount for claim in self._month_claims_in_range(month, date_from, date_to)]
+                if amounts:
+                    sketches[month] = QuantileSketch.from_values(amounts)
+        return sketches
+
+    def get_policy_type_aggregates(self) -> Dict[str, dict]:
+        """Claim count, total, max and pending count per policy type"""
+        with self._lock:
+            if self._partial and self.month_policy_aggregates is not None:
+                return self.month_policy_aggregates.rollup(_policy_type_of_key).to_dict()
+            if self._partial:
+                self._load_all_partitions()
+            return self.policy_type_aggregates.to_dict()
+
+    @_needs_all_claims
+    def get_policy_type_amount_sketches(self) -> Dict[str, QuantileSketch]:
+        """Claim amount sketch per policy type"""
+        with self._lock:
+            stale = self.policy_type_aggregates.stale_sketches()
+            if stale:
+                # One pass over the claims rebuilds every stale policy type
+                amounts: Dict[str, List[float]] = {policy_type: [] for policy_type in stale}
+                policy_type_of = {p.policyholder_id: p.policy_type for p in self.policyholders.values()}
+                for claim in self.claims.values():
+                    values = amounts.get(policy_type_of.get(claim.policyholder_id))
+                    if values is not None:
+                        values.append(claim.claim_amount)
+                for policy_type, values in amounts.items():
+                    self.policy_type_aggregates.rebuild_sketch(policy_type, values)
+            return {key: sketch.copy() for key, sketch in self.policy_type_aggregates.sketches().items()}
+
+    def get_claims_by_month(self, month: str) -> List[dict]:
+        """Get all claims filed in a month, given as YYYY-MM"""
+        return [claim.to_dict() for claim in self._month_claims(month)]
+
+    def _month_claims(self, month: str) -> List[ClaimRecord]:
+        """Claim records filed in a month, reading only its partition while loading lazily"""
+        if self._partial:
+            return list(self._month_partition(month).values())
+        with self._lock:
+            return [self.claims[claim_id] for claim_id in self._claims_by_month.get(month, {})]
+
+    @_needs_all_claims
+    def top_claims_by_amount(self, n: int = 10) -> List[dict]:
+        """The n largest claims by amount, largest first"""
+        with self._lock:
+            self._ordered_indexes()
+            claims = [self.claims[claim_id] for claim_id in self._claims_by_amount.largest(n)]
+        return [claim.to_dict() for claim in claims]
+
+    def get_claims_in_date_range(self, date_from: Optional[Union[date, str]] = None,
+                                 date_to: Optional[Union[date, str]] = None) -> List[dict]:
+        """Claims with date_from <= date_of_claim < date_to, oldest first"""
+        if self._partial:
+            # Read only the partitions the range touches
+            date_from, date_to = date_key(date_from), date_key(date_to)
+            claims = [
+                claim
+                for month in sorted(self.monthly_aggregates.groups)
+                if (date_from is None or next_month(month) > date_from) and (date_to is None or f"{month}-01" < date_to)
+                for claim in self._month_partition(month).values()
+                if (date_from is None or str(claim.date_of_claim) >= date_from)
+                and (date_to is None or str(claim.date_of_claim) < date_to)
+            ]
+            claims.sort(key=lambda c: (str(c.date_of_claim), c.claim_id))
+            return [claim.to_dict() for claim in claims]
+        with self._lock:
+            self._ordered_indexes()
+            claims = [self.claims[claim_id] for claim_id in self._claims_by_date.range(date_key(date_from), date_key(date_to))]
+        return [claim.to_dict() for claim in claims]
+
+    def iter_claims(self, chunk_size: int = 10_000) -> Iterator[List[dict]]:
+        """All claims oldest first, in lists of at most chunk_size"""
+        if self._partial:
+            # One partition at a time, without keeping the ones not already cached
+            for month in sorted(self.monthly_aggregates.groups):
+                partition = self._partitions.get(month)
+                if partition is None:
+                    partition = self._read_partition(month)
+                claims = sorted(partition.values(), key=lambda c: (str(c.date_of_claim), c.claim_id))
+                for start in range(0, len(claims), chunk_size):
+                    yield [claim.to_dict() for claim in claims[start:start + chunk_size]]
+            return
+        last = None
+        while True:
+            # Resume after the last claim yielded, so mutations between chunks are safe
+            with self._lock:
+                self._ordered_indexes()
+                chunk = [self.claims[claim_id].to_dict() for claim_id in self._claims_by_date.after(last, chunk_size)]
+            if not chunk:
+                return
+            yield chunk
+            last = (str(chunk[-1]["date_of_claim"]), chunk[-1]["claim_id"])
+
+    @_needs_all_claims
+    def latest_claims_by_status(self, status: str, n: int = 10) -> List[dict]:
+        """The n most recent claims with the given status, newest first"""
+        with self._lock:
+            self._ordered_indexes()
+            index = self._status_by_date.get(status)
+            if index is None:
+                return []
+            claims = [self.claims[claim_id] for claim_id in islice(index.range(descending=True), max(n, 0))]
+        return [claim.to_dict() for claim in claims]
+
+    @staticmethod
+    def _page(rows: List[dict], sort_key, descending: bool, offset: int, limit: int) -> List[dict]:
+        """One sorted page of rows without sorting past the end of the page"""
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return select(offset + limit, rows, key=sort_key)[offset:]
+
+    @_needs_all_claims
+    def query_claims(self, status: Optional[str] = None, policyholder_id: Optional[str] = None,
+                     date_from: Optional[Union[date, str]] = None, date_to: Optional[Union[date, str]] = None,
+                     min_amount: Optional[float] = None, max_amount: Optional[float] = None,
+                     sort_by: str = "date_of_claim", descending: bool = True,
+                     offset: int = 0, limit: int = 50) -> Tuple[List[dict], int]:
+        """Filter, sort and page claims, starting from the narrowest index"""
+        if sort_by not in CLAIM_SORT_FIELDS:
+            raise ValueError(f"Cannot sort claims by {sort_by}")
+
+        # Sessions share this instance, so scan under the lock a writer takes to change the dicts
+        with self._lock:
+            candidates = [
+                ids for ids in (
+                    self._claims_by_policyholder.get(policyholder_id, {}) if policyholder_id else None,
+                    self._claims_by_status.get(status, {}) if status else None
+                ) if ids is not None
+            ]
+            if not candidates:
+                claim_ids = self.claims
+            else:
+                candidates.sort(key=len)
+                claim_ids = [c for c in candidates[0] if all(c in other for other in candidates[1:])]
+
+            date_from, date_to = date_key(date_from), date_key(date_to)
+            # Encoded dates are compared with the bounds as epochs; anything else as strings
+            epoch_from, epoch_to = encode_bound(date_from), encode_bound(date_to)
+            dated = date_from is not None or date_to is not None
+            string_bounds = (date_from is not None and epoch_from is None) or (date_to is not None and epoch_to is None)
+            all_encoded = True
+            matches = []
+            for claim_id in claim_ids:
+                claim = self.claims[claim_id]
+                claim_date = claim.date_value
+                if isinstance(claim_date, int):
+                    if epoch_from is not None and claim_date < epoch_from:
+                        continue
+                    if epoch_to is not None and claim_date >= epoch_to:
+                        continue
+                else:
+                    all_encoded = False
+                if dated and (string_bounds or not isinstance(claim_date, int)):
+                    claim_date = str(claim.date_of_claim)
+                    if date_from is not None and claim_date < date_from:
+                        continue
+                    if date_to is not None and claim_date >= date_to:
+                        continue
+                amount = float(claim.claim_amount)
+                if min_amount is not None and amount < min_amount:
+                    continue
+                if max_amount is not None and amount > max_amount:
+                    continue
+                matches.append(claim)
+
+        if sort_by == "claim_amount":
+            sort_key = lambda c: float(c.claim_amount)
+        elif sort_by == "date_of_claim" and all_encoded:
+            # Epochs order the same way as the date strings they encode
+            sort_key = lambda c: c.date_value
+        else:
+            sort_key = lambda c: str(c[sort_by])
+        page = self._page(matches, sort_key, descending, offset, limit)
+        return [claim.to_dict() for claim in page], len(matches)
+
+    def query_policyholders(self, policy_type: Optional[str] = None, search: Optional[str] = None,
+                            sort_by: str = "policyholder_id", descending: bool = False,
+                            offset: int = 0, limit: int = 50) -> Tuple[List[dict], int]:
+        """Filter, sort and page policyholders"""
+        if sort_by not in POLICYHOLDER_SORT_FIELDS:
+            raise ValueError(f"Cannot sort policyholders by {sort_by}")
+
+        needle = search.strip().lower() if search else None
+        with self._lock:
+            matches = [
+                p for p in self.policyholders.values()
+                if (policy_type is None or p.policy_type == policy_type)
+                and (not needle or p.policyholder_id.lower().startswith(needle) or needle in p.name.lower())
+            ]
+
+        if sort_by in ("age", "sum_insured"):
+            sort_key = lambda p: float(p[sort_by])
+        else:
+            sort_key = lambda p: str(p[sort_by])
+        page = self._page(matches, sort_key, descending, offset, limit)
+        return [policyholder.to_dict() for policyholder in page], len(matches)
+
+    @_needs_all_claims
+    def search_claim_ids(self, prefix: str, limit: int = 20) -> List[str]:
+        """Claim IDs starting with prefix, at most limit of them"""
+        prefix = prefix.strip().upper()
+        with self._lock:
+            return list(islice((c for c in self.claims if c.upper().startswith(prefix)), limit))
+
+
+def shared_options(backend: str) -> dict:
+    """Options every process opening the same store must agree on.
+
+    Changes are journaled by the app, so a process that opened the files
+    without the journal would miss them and overwrite them on save.
+    """
+    return {"journal": True} if backend in ("json", "partitioned") else {}
+
+
+def create_data_service(backend: str = "json", data_dir: str = "data", **options) -> StorageBackend:
+    """Create a DataService for the named storage backend ("json", "partitioned" or "sqlite")"""
+    if backend == "json":
+        return DataService(data_dir, **options)
+    if backend == "partitioned":
+        return DataService(data_dir, partitioned=True, **options)
+    if backend == "sqlite":
+        from .sqlite_data_service import SqliteDataService
+        return SqliteDataService(f"{data_dir}/insurance.db", **options)
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,156 @@
+"""Chunked export of claims joined with their policyholders.
+
+Full claim dump from the command line:
+    python -m services.export_service --format parquet --output claims.parquet
+"""
+import argparse
+import io
+import os
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+from .data_service import create_data_service, shared_options
+from .instrumentation import instrument_class
+from .storage_backend import StorageBackend
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Parquet export is optional; CSV needs nothing beyond pandas
+    pa = pq = None
+
+# Claims converted and written per step; memory use scales with this, not the claim count
+EXPORT_CHUNK_SIZE = 10_000
+
+EXPORT_COLUMNS = ["claim_id", "policyholder_id", "policyholder_name", "policy_type",
+                  "claim_amount", "reason", "status", "date_of_claim"]
+
+# Claim fields copied as they are; the policyholder columns are looked up
+CLAIM_FIELDS = ["claim_id", "policyholder_id", "claim_amount", "reason", "status", "date_of_claim"]
+
+EXPORT_FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def parquet_available() -> bool:
+    return pq is not None
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+@instrument_class
+class ExportService:
+    def __init__(self, data_service: StorageBackend):
+        self.data_service = data_service
+
+    def iter_claim_frames(self, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """Claims oldest first with policyholder name and policy type, one frame per chunk"""
+        # Policyholders are looked up per claim, so only the claims are chunked
+        policyholders: Dict[str, Tuple[str, str]] = {
+            p["policyholder_id"]: (p["name"], p["policy_type"])
+            for p in self.data_service.get_all_policyholders()
+        }
+        for claims in self.data_service.iter_claims(chunk_size):
+            frame = pd.DataFrame(claims, columns=CLAIM_FIELDS)
+            names, policy_types = zip(*(policyholders.get(c["policyholder_id"], (None, None)) for c in claims))
+            frame.insert(2, "policyholder_name", names)
+            frame.insert(3, "policy_type", policy_types)
+            frame["claim_amount"] = frame["claim_amount"].astype("float64")
+            frame["date_of_claim"] = frame["date_of_claim"].astype(str)
+            yield frame
+
+    def stream_claims_csv(self, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+        """UTF-8 CSV of all claims, yielded one chunk at a time"""
+        header = True
+        for frame in self.iter_claim_frames(chunk_size):
+            yield frame.to_csv(index=False, header=header).encode("utf-8")
+            header = False
+        if header:
+            yield (",".join(EXPORT_COLUMNS) + "\n").encode("utf-8")
+
+    def stream_claims_parquet(self, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Parquet file of all claims, yielded one row group at a time"""
+        if pq is None:
+            raise RuntimeError("Parquet export needs pyarrow, which is not installed")
+        schema = pa.schema([
+            (column, pa.float64() if column == "claim_amount" else pa.string()) for column in EXPORT_COLUMNS
+        ])
+        sink = _DrainableSink()
+        writer = pq.ParquetWriter(sink, schema)
+        try:
+            for frame in self.iter_claim_frames(chunk_size):
+                writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+                yield sink.drain()
+        finally:
+            # Writes the footer; an empty export is still a valid file
+            writer.close()
+        yield sink.drain()
+
+    def stream_claims(self, file_format: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+        """All claims in the given format ("csv" or "parquet"), chunk by chunk"""
+        if file_format == "csv":
+            return self.stream_claims_csv(chunk_size)
+        if file_format == "parquet":
+            return self.stream_claims_parquet(chunk_size)
+        raise ValueError(f"Unknown export format: {file_format}")
+
+    def export_claims(self, path: str, file_format: Optional[str] = None,
+                      chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+        """Write all claims to a file, by default in the format its extension names; returns bytes written"""
+        file_format = file_format or os.path.splitext(path)[1].lstrip(".").lower()
+        written = 0
+        # Written next to the target and renamed, so readers never see half an export
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                for data in self.stream_claims(file_format, chunk_size):
+                    f.write(data)
+                    written += len(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export every claim with its policyholder name and policy type")
+    parser.add_argument("--backend", choices=["json", "partitioned", "sqlite"], default="json")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default=None,
+                        help="Default: taken from the output file extension")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    parser.add_argument("--output", default="claims.csv")
+    args = parser.parse_args(argv)
+
+    data_service = create_data_service(args.backend, args.data_dir, **shared_options(args.backend))
+    written = ExportService(data_service).export_claims(args.output, args.format, args.chunk_size)
+    print(f"Exported {data_service.count_claims()} claims ({written:,} bytes) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Bulk ingest of policyholders and claims from JSONL files.
+
+Usage:
+    python -m services.ingest claims path/to/claims.jsonl [--batch-size 1000]
+    python -m services.ingest policyholders path/to/policyholders.jsonl --backend sqlite
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+from pydantic import TypeAdapter, ValidationError
+from models.claim import Claim
+from models.policyholder import Policyholder
+from .data_service import create_data_service, shared_options
+from .storage_backend import StorageBackend
+
+MODELS = {
+    "policyholders": Policyholder,
+    "claims": Claim
+}
+
+
+def _read_batches(path: str, batch_size: int,
+                  rejected: List[Dict]) -> Iterator[List[Tuple[int, dict]]]:
+    """Stream (line number, raw record) batches, recording unparseable lines"""
+    batch = []
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                batch.append((line_number, json.loads(line)))
+            except json.JSONDecodeError as e:
+                rejected.append({"line": line_number, "error": f"Invalid JSON: {e}"})
+                continue
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def validate_batch(adapter: TypeAdapter, batch: List[Tuple[int, dict]],
+                   rejected: List[Dict]) -> List[dict]:
+    """Validate a batch with one TypeAdapter call and return the accepted records.
+
+    Rows that fail validation are added to rejected with their line numbers;
+    the remaining rows are validated again as a whole.
+    """
+    while batch:
+        try:
+            models = adapter.validate_python([raw for _, raw in batch])
+            return [model.model_dump() for model in models]
+        except ValidationError as e:
+            errors: Dict[int, List[str]] = {}
+            for error in e.errors():
+                position = error["loc"][0]
+                field = ".".join(str(part) for part in error["loc"][1:])
+                errors.setdefault(position, []).append(f"{field}: {error['msg']}" if field else error["msg"])
+            for position, messages in errors.items():
+                rejected.append({"line": batch[position][0], "error": "; ".join(messages)})
+            batch = [row for position, row in enumerate(batch) if position not in errors]
+    return []
+
+
+def ingest_jsonl(data_service: StorageBackend, kind: str, path: str,
+                 batch_size: int = 1000) -> Dict:
+    """Stream a JSONL file into the store, persisting once per batch"""
+    adapter = TypeAdapter(List[MODELS[kind]])
+    add_batch = data_service.add_policyholders if kind == "policyholders" else data_service.add_claims
+    accepted = 0
+    rejected: List[Dict] = []
+
+    for batch in _read_batches(path, batch_size, rejected):
+        records = validate_batch(adapter, batch, rejected)
+        if records:
+            add_batch(records)
+            accepted += len(records)
+
+    return {
+        "accepted": accepted,
+        "rejected": sorted(rejected, key=lambda r: r["line"])
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk ingest policyholders or claims from a JSONL file")
+    parser.add_argument("kind", choices=sorted(MODELS))
+    parser.add_argument("path", help="JSONL file with one record per line")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--backend", choices=["json", "partitioned", "sqlite"], default="json")
+    parser.add_argument("--data-dir", default="data")
+    args = parser.parse_args(argv)
+
+    data_service = create_data_service(args.backend, args.data_dir, **shared_options(args.backend))
+    result = ingest_jsonl(data_service, args.kind, args.path, args.batch_size)
+
+    for row in result["rejected"]:
+        print(f"line {row['line']}: {row['error']}", file=sys.stderr)
+    print(f"Ingested {result['accepted']} {args.kind}, rejected {len(result['rejected'])}")
+    return 1 if result["rejected"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+# Each stat keeps its most recent durations for percentiles, so memory stays bounded
+SAMPLE_SIZE = 1024
+
+_enabled = os.environ.get("INSURANCE_INSTRUMENTATION", "") not in ("", "0")
+_lock = threading.Lock()
+_stats: Dict[str, "Stat"] = {}
+
+
+class Stat:
+    """Call count, latency and processed row count for one instrumented name"""
+
+    __slots__ = ("calls", "total_seconds", "rows", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def to_dict(self) -> dict:
+        samples = sorted(self.samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0
+        return {
+            "calls": self.calls,
+            "total_ms": self.total_seconds * 1000,
+            "mean_ms": self.total_seconds * 1000 / self.calls if self.calls else 0.0,
+            "p95_ms": p95 * 1000,
+            "rows": self.rows
+        }
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """Drop all recorded stats"""
+    with _lock:
+        _stats.clear()
+
+
+def record(name: str, seconds: float, rows: Optional[int] = None):
+    """Add one observation to a stat"""
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            stat = _stats[name] = Stat()
+        stat.calls += 1
+        stat.total_seconds += seconds
+        stat.samples.append(seconds)
+        if rows:
+            stat.rows += rows
+
+
+def _row_count(result) -> Optional[int]:
+    """Rows in a returned list, keyed dict or DataFrame; None for scalars"""
+    if isinstance(result, (str, bytes)):
+        return None
+    if isinstance(result, dict):
+        # A dict of records counts its entries; a single record counts as one row
+        if result and isinstance(next(iter(result.values())), dict):
+            return len(result)
+        return 1 if result else 0
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def instrumented(fn: Callable, name: Optional[str] = None) -> Callable:
+    """Wrap a function so its calls are timed while instrumentation is enabled"""
+    name = name or fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        record(name, time.perf_counter() - start, _row_count(result))
+        return result
+
+    return wrapper
+
+
+def instrument_class(cls):
+    """Class decorator instrumenting every public method defined on the class"""
+    for attr, value in list(vars(cls).items()):
+        if not attr.startswith("_") and callable(value) and not isinstance(value, type):
+            setattr(cls, attr, instrumented(value, f"{cls.__name__}.{attr}"))
+    return cls
+
+
+class Timer:
+    """Handle yielded by timed(); set rows to report how many rows a section handled"""
+
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        self.rows: Optional[int] = None
+
+
+@contextmanager
+def timed(name: str) -> Iterator[Timer]:
+    """Time a block of code, such as one section of a Streamlit page"""
+    timer = Timer()
+    if not _enabled:
+        yield timer
+        return
+    start = time.perf_counter()
+    try:
+        yield timer
+    finally:
+        record(name, time.perf_counter() - start, timer.rows)
+
+
+def get_stats() -> Dict[str, dict]:
+    """Current stats keyed by instrumented name"""
+    with _lock:
+        return {name: stat.to_dict() for name, stat in sorted(_stats.items())}
+
+
+def dump_json(path: Optional[str] = None) -> str:
+    """Serialize the current stats, optionally writing them to a file"""
+    payload = json.dumps({"enabled": _enabled, "stats": get_stats()}, indent=2)
+    if path:
+        with open(path, "w") as f:
+            f.write(payload)
+    return payload
@@ -0,0 +1,54 @@
+import json
+import os
+from typing import List, Optional, Tuple
+
+
+class Journal:
+    """Append-only log of DataService mutations, one JSON record per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def append_many(self, records: List[dict]):
+        """Append a batch of mutation records with a single write and fsync"""
+        with open(self.path, "a") as f:
+            f.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read_from(self, offset: int = 0) -> Tuple[List[dict], int]:
+        """Records logged after a byte offset, and the offset just past the last complete one.
+
+        Reading stops at a torn trailing write.
+        """
+        records = []
+        if not os.path.exists(self.path):
+            return records, 0
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+                offset += len(line)
+        return records, offset
+
+    def size(self) -> int:
+        """Current size of the log in bytes"""
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path)
+
+    def truncate(self, checkpoint: Optional[dict] = None):
+        """Discard all logged records once they are folded into a snapshot.
+
+        A checkpoint record, if given, becomes the first line of the new log.
+        """
+        with open(self.path, "w") as f:
+            if checkpoint is not None:
+                f.write(json.dumps(checkpoint, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
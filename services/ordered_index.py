@@ -0,0 +1,50 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+
+class OrderedIndex:
+    """Claim ids kept sorted by a key, for top-N and range lookups.
+
+    Entries are (key, claim_id) tuples in one sorted list, so the claim id
+    breaks ties and every entry is unique. Lookups bisect to the start of
+    the range and then walk only the entries they return.
+    """
+
+    __slots__ = ("_entries",)
+
+    def __init__(self, entries: Optional[Iterable[Tuple[Any, str]]] = None):
+        self._entries: List[Tuple[Any, str]] = sorted(entries) if entries is not None else []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def entries(self) -> List[Tuple[Any, str]]:
+        """All (key, claim_id) entries in key order"""
+        return self._entries
+
+    def add(self, key, claim_id: str):
+        insort(self._entries, (key, claim_id))
+
+    def remove(self, key, claim_id: str):
+        entry = (key, claim_id)
+        position = bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+    def largest(self, n: int) -> List[str]:
+        """Claim ids of the n largest keys, largest first"""
+        return [claim_id for _, claim_id in islice(reversed(self._entries), max(n, 0))]
+
+    def after(self, entry: Optional[Tuple[Any, str]], n: int) -> List[str]:
+        """Claim ids of the n entries following (key, claim_id) in key order; None starts at the first"""
+        start = 0 if entry is None else bisect_right(self._entries, entry)
+        return [claim_id for _, claim_id in self._entries[start:start + max(n, 0)]]
+
+    def range(self, low=None, high=None, descending: bool = False) -> Iterator[str]:
+        """Claim ids with low <= key < high; a None bound is open"""
+        start = 0 if low is None else bisect_left(self._entries, (low,))
+        stop = len(self._entries) if high is None else bisect_left(self._entries, (high,))
+        if descending:
+            return (self._entries[i][1] for i in range(stop - 1, start - 1, -1))
+        return (self._entries[i][1] for i in range(start, stop))
@@ -0,0 +1,162 @@
+"""Mergeable streaming quantile sketches for claim amounts.
+
+QuantileSketch is a KLL sketch (Karnin, Lang and Liberty, "Optimal Quantile
+Approximation in Streams", 2016). It keeps a bounded sample of the values it
+has seen, each standing for a power-of-two number of them, so:
+
+- memory stays under about 3 * k values however many claims go in
+  (k = 200 gives at most ~600 floats per group);
+- two sketches merge into one with the same guarantee, so month sketches
+  combine into a quarter or a year without going back to the claims;
+- a sketch that has seen fewer than k values keeps all of them and its
+  quantiles are exact.
+
+Error bound: quantile(q) returns a value seen by the sketch whose rank among
+all n values seen lies within eps * n of q * n. For k = 200, eps is about
+1.7% with 99% confidence (about 0.6% typical). For p99 of 10,000 claims, the
+answer ranks between roughly the 9,730th and the 10,000th claim. Only ranks
+are bounded: where the amounts are sparse, the values at neighbouring ranks
+can be far apart.
+"""
+import random
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Iterable, List, Optional
+
+# Size of the top level; higher is more accurate and uses proportionally more memory
+SKETCH_K = 200
+
+# Each level below the top may hold 2/3 as many values as the one above
+_SHRINK = 2 / 3
+
+# Seeded, so the same claims added in the same order always give the same sketch
+_coin = random.Random(0x4B4C4C)
+
+
+class QuantileSketch:
+    """KLL sketch of a stream of amounts: bounded size, mergeable, approximate quantiles"""
+
+    __slots__ = ("k", "levels", "count", "min_value", "max_value")
+
+    def __init__(self, k: int = SKETCH_K):
+        self.k = k
+        # levels[h] holds sampled values that each stand for 2 ** h of the values seen
+        self.levels: List[List[float]] = [[]]
+        self.count = 0
+        self.min_value: Optional[float] = None
+        self.max_value: Optional[float] = None
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], k: int = SKETCH_K) -> "QuantileSketch":
+        sketch = cls(k)
+        sketch.update_many(values)
+        return sketch
+
+    def _capacity(self, level: int) -> int:
+        return max(int(self.k * _SHRINK ** (len(self.levels) - level - 1)), 2)
+
+    def update(self, value: float):
+        """Add one value"""
+        value = float(value)
+        if self.count == 0:
+            self.min_value = self.max_value = value
+        elif value < self.min_value:
+            self.min_value = value
+        elif value > self.max_value:
+            self.max_value = value
+        self.count += 1
+        level_zero = self.levels[0]
+        level_zero.append(value)
+        if len(level_zero) >= self._capacity(0):
+            self._compact()
+
+    def update_many(self, values: Iterable[float]):
+        """Add a batch of values.
+
+        The batch is compacted in one go rather than a few values at a time,
+        which is faster and, with fewer compactions, no less accurate.
+        """
+        values = [float(value) for value in values]
+        if not values:
+            return
+        low, high = min(values), max(values)
+        if self.count == 0:
+            self.min_value, self.max_value = low, high
+        else:
+            self.min_value, self.max_value = min(self.min_value, low), max(self.max_value, high)
+        self.count += len(values)
+        self.levels[0].extend(values)
+        self._compact()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold another sketch into this one and return this one"""
+        if other.count == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, values in enumerate(other.levels):
+            self.levels[level].extend(values)
+        if self.count == 0:
+            self.min_value, self.max_value = other.min_value, other.max_value
+        else:
+            self.min_value = min(self.min_value, other.min_value)
+            self.max_value = max(self.max_value, other.max_value)
+        self.count += other.count
+        self._compact()
+        return self
+
+    def _compact(self):
+        """Halve every level that reached its capacity, lowest first"""
+        level = 0
+        while level < len(self.levels):
+            values = self.levels[level]
+            if len(values) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                values.sort()
+                # Every other value, from a random start, moves up at twice the weight
+                kept = [values.pop()] if len(values) % 2 else []
+                self.levels[level + 1].extend(values[_coin.getrandbits(1)::2])
+                self.levels[level] = kept
+            level += 1
+
+    def copy(self) -> "QuantileSketch":
+        sketch = QuantileSketch(self.k)
+        sketch.levels = [list(values) for values in self.levels]
+        sketch.count = self.count
+        sketch.min_value, sketch.max_value = self.min_value, self.max_value
+        return sketch
+
+    @property
+    def size(self) -> int:
+        """Number of values held, which bounds the memory used"""
+        return sum(len(values) for values in self.levels)
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        """Value at each quantile q in [0, 1] (no interpolation); None for an empty sketch"""
+        qs = list(qs)
+        if self.count == 0:
+            return [None] * len(qs)
+        weighted = sorted((value, 1 << level) for level, values in enumerate(self.levels) for value in values)
+        cumulative = list(accumulate(weight for _, weight in weighted))
+        result = []
+        for q in qs:
+            if q <= 0:
+                result.append(self.min_value)
+            elif q >= 1:
+                result.append(self.max_value)
+            else:
+                index = bisect_left(cumulative, q * cumulative[-1])
+                result.append(weighted[min(index, len(weighted) - 1)][0])
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.quantiles([q])[0]
+
+
+def merge_sketches(sketches: Iterable[QuantileSketch], k: int = SKETCH_K) -> QuantileSketch:
+    """A new sketch of everything the given sketches have seen; the inputs are left as they are"""
+    merged = QuantileSketch(k)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
@@ -0,0 +1,226 @@
+"""Compact in-memory claim and policyholder records.
+
+A record keeps each field in a slot instead of a per-record dict, holds
+status and policy type as small integer codes, dates as epoch microseconds
+and policyholder ids interned, so the ids repeated across claims share one
+string. to_dict() gives back the plain dict form stored on disk.
+"""
+import sys
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Union
+from models.claim import ClaimStatus
+from models.policyholder import PolicyType
+
+CLAIM_FIELDS = ["claim_id", "policyholder_id", "claim_amount", "reason", "status", "date_of_claim"]
+POLICYHOLDER_FIELDS = ["policyholder_id", "name", "age", "policy_type", "sum_insured", "registration_date"]
+_CLAIM_FIELD_SET = frozenset(CLAIM_FIELDS)
+_POLICYHOLDER_FIELD_SET = frozenset(POLICYHOLDER_FIELDS)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROS_PER_DAY = 86_400_000_000
+
+
+class CodeTable:
+    """Small integer codes for a set of strings, extended when an unknown one turns up"""
+
+    __slots__ = ("values", "_codes", "_lock")
+
+    def __init__(self, values: Iterable[str]):
+        self.values: List[str] = list(values)
+        self._codes: Dict[str, int] = {value: code for code, value in enumerate(self.values)}
+        self._lock = threading.Lock()
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = self._codes[value] = len(self.values)
+                    self.values.append(value)
+        return code
+
+
+STATUS_CODES = CodeTable(status.value for status in ClaimStatus)
+POLICY_TYPE_CODES = CodeTable(policy_type.value for policy_type in PolicyType)
+
+
+def encode_date(value) -> Union[int, str]:
+    """Epoch microseconds of a str(datetime) value; anything else is kept as it is"""
+    # Only the exact form str(datetime) produces is encoded, so decoding restores it
+    if not isinstance(value, str) or len(value) not in (19, 26) or value[10] != " ":
+        return value
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if parsed.tzinfo is not None or (len(value) == 26 and not parsed.microsecond):
+        return value
+    delta = parsed - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def encode_bound(value: Optional[str]) -> Optional[int]:
+    """Epoch microseconds of a YYYY-MM-DD or str(datetime) bound, None for any other form"""
+    if value is not None and len(value) == 10:
+        value = f"{value} 00:00:00"
+    encoded = encode_date(value)
+    return encoded if isinstance(encoded, int) else None
+
+
+@lru_cache(maxsize=1 << 16)
+def _day(days: int) -> str:
+    return str((_EPOCH + timedelta(days=days)).date())
+
+
+def decode_date(value: Union[int, str]):
+    """The str(datetime) form of an encode_date result"""
+    if not isinstance(value, int):
+        return value
+    days, micros = divmod(value, _MICROS_PER_DAY)
+    seconds, micros = divmod(micros, 1_000_000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    text = f"{_day(days)} {hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{text}.{micros:06d}" if micros else text
+
+
+def date_month(value: Union[int, str]) -> str:
+    """YYYY-MM of an encode_date result"""
+    if isinstance(value, int):
+        return _day(value // _MICROS_PER_DAY)[:7]
+    return str(value)[:7]
+
+
+class ClaimRecord:
+    """One claim; reads like a read-only dict via record["field"]"""
+
+    __slots__ = ("claim_id", "policyholder_id", "claim_amount", "reason", "status_code", "date_value", "extra")
+
+    def __init__(self, claim_id: str, policyholder_id: str, claim_amount: float, reason: str,
+                 status_code: int, date_value: Union[int, str], extra: Optional[dict] = None):
+        self.claim_id = claim_id
+        self.policyholder_id = sys.intern(policyholder_id)
+        self.claim_amount = claim_amount
+        self.reason = reason
+        self.status_code = status_code
+        self.date_value = date_value
+        # Fields beyond the model's, kept so they survive a save
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ClaimRecord":
+        extra = None if data.keys() <= _CLAIM_FIELD_SET else {
+            key: value for key, value in data.items() if key not in _CLAIM_FIELD_SET
+        }
+        return cls(data["claim_id"], data["policyholder_id"], data.get("claim_amount"), data.get("reason"),
+                   STATUS_CODES.code(data.get("status")), encode_date(data.get("date_of_claim")), extra or None)
+
+    @property
+    def status(self) -> str:
+        return STATUS_CODES.values[self.status_code]
+
+    @status.setter
+    def status(self, value: str):
+        self.status_code = STATUS_CODES.code(value)
+
+    @property
+    def date_of_claim(self):
+        return decode_date(self.date_value)
+
+    def month(self) -> str:
+        return date_month(self.date_value)
+
+    def __getitem__(self, key: str):
+        if key in _CLAIM_FIELD_SET:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> dict:
+        data = {
+            "claim_id": self.claim_id,
+            "policyholder_id": self.policyholder_id,
+            "claim_amount": self.claim_amount,
+            "reason": self.reason,
+            "status": STATUS_CODES.values[self.status_code],
+            "date_of_claim": decode_date(self.date_value)
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+class PolicyholderRecord:
+    """One policyholder; reads like a read-only dict via record["field"]"""
+
+    __slots__ = ("policyholder_id", "name", "age", "policy_type_code", "sum_insured", "registration_value", "extra")
+
+    def __init__(self, policyholder_id: str, name: str, age: int, policy_type_code: int, sum_insured: float,
+                 registration_value: Union[int, str], extra: Optional[dict] = None):
+        self.policyholder_id = sys.intern(policyholder_id)
+        self.name = name
+        self.age = age
+        self.policy_type_code = policy_type_code
+        self.sum_insured = sum_insured
+        self.registration_value = registration_value
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PolicyholderRecord":
+        extra = None if data.keys() <= _POLICYHOLDER_FIELD_SET else {
+            key: value for key, value in data.items() if key not in _POLICYHOLDER_FIELD_SET
+        }
+        return cls(data["policyholder_id"], data.get("name"), data.get("age"),
+                   POLICY_TYPE_CODES.code(data.get("policy_type")), data.get("sum_insured"),
+                   encode_date(data.get("registration_date")), extra or None)
+
+    @property
+    def policy_type(self) -> str:
+        return POLICY_TYPE_CODES.values[self.policy_type_code]
+
+    @property
+    def registration_date(self):
+        return decode_date(self.registration_value)
+
+    def __getitem__(self, key: str):
+        if key in _POLICYHOLDER_FIELD_SET:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> dict:
+        data = {
+            "policyholder_id": self.policyholder_id,
+            "name": self.name,
+            "age": self.age,
+            "policy_type": POLICY_TYPE_CODES.values[self.policy_type_code],
+            "sum_insured": self.sum_insured,
+            "registration_date": decode_date(self.registration_value)
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+def record_to_json(value):
+    """json.dump default hook: records as their dict form, anything else as str"""
+    if isinstance(value, (ClaimRecord, PolicyholderRecord)):
+        return value.to_dict()
+    return str(value)
@@ -1,94 +1,109 @@
-from datetime import datetime
-from typing import Dict, List
-import pandas as pd
-from .data_service import DataService
+from datetime import date
+from typing import Dict, List, Optional, Union
+from .instrumentation import instrument_class
+from .quantile_sketch import QuantileSketch, merge_sketches
+from .storage_backend import StorageBackend
 
-class ReportService:
-    def __init__(self, data_service: DataService):
-        self.data_service = data_service
+# Claim amount percentiles reported next to the averages, read from quantile sketches
+PERCENTILES = {'median_amount': 0.5, 'p90_amount': 0.9, 'p99_amount': 0.99}
 
-    def generate_monthly_claims_report(self) -> Dict:
-        """Generate report of total claims per month"""
-        claims = self.data_service.get_all_claims()
-        if not claims:
-            return {}
 
-        # Convert claims to DataFrame
-        df = pd.DataFrame(claims)
-        df['date_of_claim'] = pd.to_datetime(df['date_of_claim'])
-        df['month'] = df['date_of_claim'].dt.strftime('%Y-%m')
+def _percentiles(sketch: QuantileSketch) -> Dict:
+    return dict(zip(PERCENTILES, sketch.quantiles(PERCENTILES.values())))
 
-        monthly_claims = df.groupby('month').agg({
-            'claim_id': 'count',
-            'claim_amount': ['sum', 'mean']
-        }).reset_index()
 
-        monthly_claims.columns = ['month', 'total_claims', 'total_amount', 'average_amount']
-        
-        return monthly_claims.to_dict(orient='records')
+@instrument_class
+class ReportService:
+    def __init__(self, data_service: StorageBackend):
+        self.data_service = data_service
+
+    def generate_monthly_claims_report(self, date_from: Optional[Union[date, str]] = None,
+                                       date_to: Optional[Union[date, str]] = None) -> Dict:
+        """Generate report of total claims per month, optionally for date_from <= date < date_to"""
+        monthly = self.data_service.get_monthly_aggregates(date_from, date_to)
+
+        return [
+            {
+                'month': month,
+                'total_claims': group['count'],
+                'total_amount': group['total'],
+                'average_amount': group['total'] / group['count']
+            }
+            for month, group in monthly.items()
+        ]
 
     def calculate_average_claim_by_policy(self) -> Dict:
         """Calculate average claim amount by policy type"""
-        claims = self.data_service.get_all_claims()
-        policyholders = self.data_service.get_all_policyholders()
-        
-        if not claims or not policyholders:
-            return {}
-
-        # Create DataFrames
-        claims_df = pd.DataFrame(claims)
-        policyholders_df = pd.DataFrame(policyholders)
-
-        # Merge claims with policyholders
-        merged_df = claims_df.merge(
-            policyholders_df[['policyholder_id', 'policy_type']],
-            on='policyholder_id'
-        )
-
-        # Calculate averages by policy type
-        policy_averages = merged_df.groupby('policy_type').agg({
-            'claim_amount': ['mean', 'sum', 'count']
-        }).round(2)
-
-        policy_averages.columns = ['average_amount', 'total_amount', 'claim_count']
-        
-        return policy_averages.to_dict(orient='index')
-
-    def get_highest_claim(self) -> Dict:
-        """Get details of the highest claim filed"""
-        claims = self.data_service.get_all_claims()
-        if not claims:
-            return {}
+        by_policy = self.data_service.get_policy_type_aggregates()
 
-        highest_claim = max(claims, key=lambda x: float(x['claim_amount']))
-        policyholder = self.data_service.get_policyholder(highest_claim['policyholder_id'])
+        return {
+            policy_type: {
+                'average_amount': round(group['total'] / group['count'], 2),
+                'total_amount': round(group['total'], 2),
+                'claim_count': group['count']
+            }
+            for policy_type, group in sorted(by_policy.items())
+        }
 
+    def generate_monthly_percentiles_report(self, date_from: Optional[Union[date, str]] = None,
+                                            date_to: Optional[Union[date, str]] = None) -> List[Dict]:
+        """Median, p90 and p99 claim amount per month, optionally for date_from <= date < date_to"""
+        return [
+            {'month': month, 'total_claims': sketch.count, **_percentiles(sketch)}
+            for month, sketch in self.data_service.get_monthly_amount_sketches(date_from, date_to).items()
+        ]
+
+    def calculate_claim_percentiles(self, date_from: Optional[Union[date, str]] = None,
+                                    date_to: Optional[Union[date, str]] = None) -> Dict:
+        """Median, p90 and p99 claim amount over a date range, combined from the month sketches"""
+        sketch = merge_sketches(self.data_service.get_monthly_amount_sketches(date_from, date_to).values())
+        return {'claim_count': sketch.count, **_percentiles(sketch)}
+
+    def calculate_percentiles_by_policy(self) -> Dict:
+        """Median, p90 and p99 claim amount by policy type"""
         return {
-            'claim_id': highest_claim['claim_id'],
-            'policyholder_id': highest_claim['policyholder_id'],
-            'policyholder_name': policyholder['name'],
-            'claim_amount': highest_claim['claim_amount'],
-            'date_of_claim': highest_claim['date_of_claim'],
-            'policy_type': policyholder['policy_type'],
-            'status': highest_claim['status']
+            policy_type: {**_percentiles(sketch), 'claim_count': sketch.count}
+            for policy_type, sketch in sorted(self.data_service.get_policy_type_amount_sketches().items())
         }
 
-    def get_pending_claims_report(self) -> List[Dict]:
-        """Get list of policyholders with pending claims"""
-        claims = self.data_service.get_all_claims()
+    def get_top_claims(self, n: int = 10) -> List[Dict]:
+        """Get details of the n highest claims filed, highest first"""
+        top_claims = []
+
+        for claim in self.data_service.top_claims_by_amount(n):
+            policyholder = self.data_service.get_policyholder(claim['policyholder_id'])
+            top_claims.append({
+                'claim_id': claim['claim_id'],
+                'policyholder_id': claim['policyholder_id'],
+                'policyholder_name': policyholder['name'],
+                'claim_amount': claim['claim_amount'],
+                'date_of_claim': claim['date_of_claim'],
+                'policy_type': policyholder['policy_type'],
+                'status': claim['status']
+            })
+
+        return top_claims
+
+    def get_highest_claim(self) -> Dict:
+        """Get details of the highest claim filed"""
+        top_claims = self.get_top_claims(1)
+        return top_claims[0] if top_claims else {}
+
+    def get_pending_claims_report(self, limit: int = 50) -> List[Dict]:
+        """Get the most recent pending claims with their policyholders, newest first"""
+        claims = self.data_service.latest_claims_by_status('Pending', limit)
         pending_claims = []
 
         for claim in claims:
-            if claim['status'] == 'Pending':
-                policyholder = self.data_service.get_policyholder(claim['policyholder_id'])
-                pending_claims.append({
-                    'claim_id': claim['claim_id'],
-                    'policyholder_id': claim['policyholder_id'],
-                    'policyholder_name': policyholder['name'],
-                    'claim_amount': claim['claim_amount'],
-                    'date_of_claim': claim['date_of_claim'],
-                    'policy_type': policyholder['policy_type'],
-                    'reason': claim['reason']
-                })
-
-        return sorted(pending_claims, key=lambda x: x['date_of_claim'], reverse=True) 
\ No newline at end of file
+            policyholder = self.data_service.get_policyholder(claim['policyholder_id'])
+            pending_claims.append({
+                'claim_id': claim['claim_id'],
+                'policyholder_id': claim['policyholder_id'],
+                'policyholder_name': policyholder['name'],
+                'claim_amount': claim['claim_amount'],
+                'date_of_claim': claim['date_of_claim'],
+                'policy_type': policyholder['policy_type'],
+                'reason': claim['reason']
+            })
+
+        return pending_claims 
\ No newline at end of file
@@ -1,96 +1,328 @@
+"""Risk metrics for policyholders.
+
+Full-book scoring from the command line, using every core:
+    python -m services.risk_service --workers 8 --output risk_scores.json
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict
+from functools import partial
+from typing import List, Dict, Optional, Sequence
+import numpy as np
 import pandas as pd
-from .data_service import DataService
+from .claim_timeline import ClaimTimeline, claim_epoch, count_between, to_epoch
+from .data_service import create_data_service, shared_options
+from .instrumentation import instrument_class
+from .storage_backend import StorageBackend
+
+# Policyholders per shard when scoring in parallel
+SHARD_SIZE = 50_000
+
+
+def score_shard(shard: Dict[str, np.ndarray], max_recent_claims: int, max_claim_ratio: float,
+                cutoff: np.datetime64) -> Dict[str, np.ndarray]:
+    """Score one shard of policyholders.
+
+    codes index the shard's policyholders from 0. Module level so worker
+    processes can unpickle it.
+    """
+    codes = shard["codes"]
+    size = len(shard["sum_insured"])
+    # bincount accumulates in claim order, matching a plain sum() per policyholder
+    claim_counts = np.bincount(codes, minlength=size)
+    total_amounts = np.bincount(codes, weights=shard["amounts"], minlength=size)
+    recent_claims = np.bincount(codes[shard["timestamps"] > cutoff], minlength=size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        claim_ratios = total_amounts / shard["sum_insured"]
+    high_risk = (claim_counts > 0) & ((recent_claims > max_recent_claims) | (claim_ratios > max_claim_ratio))
+    return {
+        "claim_counts": claim_counts,
+        "recent_claims": recent_claims,
+        "total_amounts": total_amounts,
+        "claim_ratios": claim_ratios,
+        "high_risk": high_risk
+    }
+
 
+@instrument_class
 class RiskService:
-    def __init__(self, data_service: DataService):
+    def __init__(self, data_service: StorageBackend):
         self.data_service = data_service
+        self._timeline: Optional[ClaimTimeline] = None
+        self._timeline_version = -1
+        self._timeline_sequence = 0
 
-    def calculate_claim_frequency(self, policyholder_id: str) -> Dict:
-        """Calculate claim frequency for a policyholder"""
-        claims = self.data_service.get_policyholder_claims(policyholder_id)
-        total_claims = len(claims)
-        
-        if total_claims == 0:
-            return {
-                "policyholder_id": policyholder_id,
-                "total_claims": 0,
-                "claims_last_year": 0,
-                "claim_frequency": 0
-            }
+    def _claim_timeline(self) -> ClaimTimeline:
+        """Per-policyholder claim timestamps, caught up from the change feed or rebuilt"""
+        timeline = self._updated_timeline()
+        if timeline is None:
+            version, sequence = self.data_service.version, self.data_service.sequence
+            timeline = self._timeline = ClaimTimeline.from_frame(self.data_service.get_claims_frame())
+            self._timeline_version, self._timeline_sequence = version, sequence
+        return timeline
+
+    def _updated_timeline(self) -> Optional[ClaimTimeline]:
+        """The cached timeline with the claims added since it was built; None if it must be rebuilt"""
+        if self._timeline is None:
+            return None
+        version = self.data_service.version
+        if self._timeline_version == version:
+            return self._timeline
+        changes = self.data_service.changes_since(self._timeline_sequence)
+        if changes is None:
+            return None
+        added = [change["data"] for change in changes if change["op"] == "add_claim"]
+        # Status changes leave the timeline as it is. New claims are merged in, but a
+        # replaced claim's old date is not in the feed, so a count mismatch means a rebuild
+        if self.data_service.count_claims() != len(self._timeline.epochs) + len(added):
+            return None
+        if added:
+            self._timeline = self._timeline.with_claims(
+                [claim["policyholder_id"] for claim in added],
+                np.array([claim_epoch(claim["date_of_claim"]) for claim in added], dtype=np.int64)
+            )
+        self._timeline_version = version
+        if changes:
+            self._timeline_sequence = changes[-1]["seq"]
+        return self._timeline
 
-        # Calculate claims in the last year
-        one_year_ago = datetime.now() - timedelta(days=365)
-        claims_last_year = len([
-            claim for claim in claims
-            if datetime.fromisoformat(claim["date_of_claim"].split(".")[0]) > one_year_ago
-        ])
+    def calculate_claim_frequency(self, policyholder_id: str, windows: Sequence[int] = (30, 90, 365),
+                                  as_of: Optional[datetime] = None) -> Dict:
+        """Calculate claim frequency for a policyholder.
+
+        Each window counts claims in the windows days up to as_of (default now).
+        Claims after as_of are ignored when it is given, for back-testing.
+        """
+        timeline = self._updated_timeline()
+        if timeline is not None:
+            epochs = timeline.claim_epochs(policyholder_id)
+        else:
+            # Rebuilding the book-wide timeline for one policyholder would cost a pass
+            # over all claims; the policyholder index reads only theirs
+            epochs = self.data_service.get_policyholder_claim_epochs(policyholder_id)
+        now = as_of or datetime.now()
+        until = to_epoch(as_of) if as_of is not None else None
+        window_counts = {
+            days: count_between(epochs, to_epoch(now - timedelta(days=days)), until)
+            for days in sorted(set(windows) | {365})
+        }
 
         return {
             "policyholder_id": policyholder_id,
-            "total_claims": total_claims,
-            "claims_last_year": claims_last_year,
-            "claim_frequency": claims_last_year / 12  # Average claims per month
+            "total_claims": count_between(epochs, until=until),
+            "claims_last_year": window_counts[365],
+            "claim_frequency": window_counts[365] / 12,  # Average claims per month
+            "claims_in_window": {days: window_counts[days] for days in windows}
         }
 
-    def identify_high_risk_policyholders(self) -> List[Dict]:
-        """Identify high-risk policyholders based on claims"""
-        high_risk_policyholders = []
-        
-        for policyholder_id in self.data_service.policyholders:
-            policyholder = self.data_service.get_policyholder(policyholder_id)
-            claims = self.data_service.get_policyholder_claims(policyholder_id)
-            
-            if not claims:
-                continue
-
-            # Calculate total claim amount
-            total_claim_amount = sum(claim["claim_amount"] for claim in claims)
-            claim_ratio = total_claim_amount / float(policyholder["sum_insured"])
-            
-            # Check last year's claims
-            one_year_ago = datetime.now() - timedelta(days=365)
-            recent_claims = len([
-                claim for claim in claims
-                if datetime.fromisoformat(claim["date_of_claim"].split(".")[0]) > one_year_ago
-            ])
-
-            if recent_claims > 3 or claim_ratio > 0.8:
-                high_risk_policyholders.append({
-                    "policyholder_id": policyholder_id,
-                    "name": policyholder["name"],
-                    "recent_claims": recent_claims,
-                    "claim_ratio": claim_ratio,
-                    "total_claim_amount": total_claim_amount
-                })
-
-        return high_risk_policyholders
+    def calculate_claim_frequencies(self, policyholder_ids: Optional[List[str]] = None,
+                                    windows: Sequence[int] = (30, 90, 365),
+                                    as_of: Optional[datetime] = None) -> List[Dict]:
+        """Calculate claim frequency for many policyholders, by default the whole book"""
+        if policyholder_ids is None:
+            policyholder_ids = [p["policyholder_id"] for p in self.data_service.get_all_policyholders()]
+        timeline = self._claim_timeline()
+        now = as_of or datetime.now()
+        until = to_epoch(as_of) if as_of is not None else None
+
+        total_claims = timeline.counts(policyholder_ids, until=until).tolist()
+        window_counts = {
+            days: timeline.counts(policyholder_ids, to_epoch(now - timedelta(days=days)), until).tolist()
+            for days in sorted(set(windows) | {365})
+        }
+
+        return [
+            {
+                "policyholder_id": policyholder_id,
+                "total_claims": total_claims[i],
+                "claims_last_year": window_counts[365][i],
+                "claim_frequency": window_counts[365][i] / 12,  # Average claims per month
+                "claims_in_window": {days: window_counts[days][i] for days in windows}
+            }
+            for i, policyholder_id in enumerate(policyholder_ids)
+        ]
+
+    def _claim_columns(self, policyholder_ids: List[str]) -> Dict[str, np.ndarray]:
+        """Build amount, timestamp and policyholder-code columns for all claims"""
+        frame = self.data_service.get_claims_frame()
+        codes = pd.Index(policyholder_ids).get_indexer(frame["policyholder_id"])
+        amounts = frame["claim_amount"].to_numpy()
+        # Truncated to whole seconds, as the row-by-row check did with split(".")
+        timestamps = frame["date_of_claim"].to_numpy().astype("datetime64[s]")
+
+        known = codes >= 0
+        return {"codes": codes[known], "amounts": amounts[known], "timestamps": timestamps[known]}
+
+    def identify_high_risk_policyholders(self, max_recent_claims: int = 3,
+                                         max_claim_ratio: float = 0.8,
+                                         window_days: int = 365) -> List[Dict]:
+        """Identify high-risk policyholders based on claims.
+
+        A policyholder is high risk when they filed more than max_recent_claims
+        claims in the last window_days days, or when their total claimed amount
+        exceeds max_claim_ratio of their sum insured.
+        """
+        policyholders = self.data_service.get_all_policyholders()
+        if not policyholders:
+            return []
+
+        scores = self._score_book(policyholders, max_recent_claims, max_claim_ratio, window_days)
+
+        return [
+            {
+                "policyholder_id": policyholders[i]["policyholder_id"],
+                "name": policyholders[i]["name"],
+                "recent_claims": int(scores["recent_claims"][i]),
+                "claim_ratio": float(scores["claim_ratios"][i]),
+                "total_claim_amount": float(scores["total_amounts"][i])
+            }
+            for i in np.flatnonzero(scores["high_risk"]).tolist()
+        ]
+
+    def count_high_risk_policyholders(self, max_recent_claims: int = 3,
+                                      max_claim_ratio: float = 0.8,
+                                      window_days: int = 365) -> int:
+        """Number of policyholders identify_high_risk_policyholders would return"""
+        policyholders = self.data_service.get_all_policyholders()
+        if not policyholders:
+            return 0
+        scores = self._score_book(policyholders, max_recent_claims, max_claim_ratio, window_days)
+        return int(np.count_nonzero(scores["high_risk"]))
+
+    def _score_book(self, policyholders: List[dict], max_recent_claims: int, max_claim_ratio: float,
+                    window_days: int) -> Dict[str, np.ndarray]:
+        """Score all policyholders in process as one shard"""
+        cutoff = np.datetime64(datetime.now() - timedelta(days=window_days))
+        shard = self._shards(policyholders, len(policyholders))[0]
+        return score_shard(shard, max_recent_claims, max_claim_ratio, cutoff)
+
+    def _shards(self, policyholders: List[dict], shard_size: int,
+                as_of: Optional[datetime] = None) -> List[Dict[str, np.ndarray]]:
+        """Split policyholders and their claims (up to as_of, if given) into contiguous shards"""
+        columns = self._claim_columns([p["policyholder_id"] for p in policyholders])
+        if as_of is not None:
+            filed = columns["timestamps"] <= np.datetime64(as_of)
+            columns = {name: column[filed] for name, column in columns.items()}
+        # A stable sort keeps each policyholder's claims in their original order
+        order = np.argsort(columns["codes"], kind="stable")
+        codes = columns["codes"][order]
+        sum_insured = np.fromiter((float(p["sum_insured"]) for p in policyholders), dtype=np.float64,
+                                  count=len(policyholders))
+
+        shards = []
+        for start in range(0, len(policyholders), shard_size):
+            stop = min(start + shard_size, len(policyholders))
+            first, last = np.searchsorted(codes, [start, stop])
+            claims = order[first:last]
+            shards.append({
+                "codes": codes[first:last] - start,
+                "amounts": columns["amounts"][claims],
+                "timestamps": columns["timestamps"][claims],
+                "sum_insured": sum_insured[start:stop]
+            })
+        return shards
+
+    def score_policyholders(self, max_recent_claims: int = 3, max_claim_ratio: float = 0.8,
+                            window_days: int = 365, as_of: Optional[datetime] = None,
+                            workers: Optional[int] = None, shard_size: int = SHARD_SIZE) -> List[Dict]:
+        """Score every policyholder against the high-risk rules, using a process pool.
+
+        as_of back-tests the rules: claims filed after it are ignored.
+
+        The book is split into shards of shard_size policyholders, scored by
+        up to workers processes (default: one per CPU) and merged back in
+        policyholder order, so the result does not depend on the worker count.
+        A single shard or worker, or a pool that cannot start, is scored in process.
+        """
+        policyholders = self.data_service.get_all_policyholders()
+        if not policyholders:
+            return []
+
+        cutoff = np.datetime64((as_of or datetime.now()) - timedelta(days=window_days))
+        shards = self._shards(policyholders, max(1, shard_size), as_of)
+        score = partial(score_shard, max_recent_claims=max_recent_claims,
+                        max_claim_ratio=max_claim_ratio, cutoff=cutoff)
+        workers = min(workers or os.cpu_count() or 1, len(shards))
+
+        results = None
+        if workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    # map yields results in shard order whatever order workers finish in
+                    results = list(pool.map(score, shards))
+            except Exception as e:
+                print(f"Error scoring in worker processes, scoring in process instead: {e}")
+        if results is None:
+            results = [score(shard) for shard in shards]
+
+        merged = {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+        return [
+            {
+                "policyholder_id": policyholder["policyholder_id"],
+                "name": policyholder["name"],
+                "claim_count": claim_count,
+                "recent_claims": recent_claims,
+                "claim_ratio": claim_ratio,
+                "total_claim_amount": total_amount,
+                "high_risk": high_risk
+            }
+            for policyholder, claim_count, recent_claims, claim_ratio, total_amount, high_risk in zip(
+                policyholders,
+                merged["claim_counts"].tolist(),
+                merged["recent_claims"].tolist(),
+                merged["claim_ratios"].tolist(),
+                merged["total_amounts"].tolist(),
+                merged["high_risk"].tolist()
+            )
+        ]
 
     def analyze_claims_by_policy_type(self) -> Dict:
         """Analyze claims aggregated by policy type"""
-        claims_df = pd.DataFrame(self.data_service.get_all_claims())
-        policyholders_df = pd.DataFrame(self.data_service.get_all_policyholders())
-        
-        if claims_df.empty or policyholders_df.empty:
-            return {}
-
-        # Merge claims with policyholders to get policy types
-        merged_df = claims_df.merge(
-            policyholders_df[["policyholder_id", "policy_type"]],
-            on="policyholder_id"
-        )
-
-        analysis = {}
-        for policy_type in merged_df["policy_type"].unique():
-            policy_claims = merged_df[merged_df["policy_type"] == policy_type]
-            
-            analysis[policy_type] = {
-                "total_claims": len(policy_claims),
-                "total_amount": float(policy_claims["claim_amount"].sum()),
-                "average_amount": float(policy_claims["claim_amount"].mean()),
-                "max_amount": float(policy_claims["claim_amount"].max()),
-                "pending_claims": len(policy_claims[policy_claims["status"] == "Pending"])
+        by_policy = self.data_service.get_policy_type_aggregates()
+
+        return {
+            policy_type: {
+                "total_claims": group["count"],
+                "total_amount": group["total"],
+                "average_amount": group["total"] / group["count"],
+                "max_amount": group["max"],
+                "pending_claims": group["pending"]
             }
+            for policy_type, group in by_policy.items()
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Score every policyholder against the high-risk rules")
+    parser.add_argument("--backend", choices=["json", "partitioned", "sqlite"], default="json")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    parser.add_argument("--max-recent-claims", type=int, default=3)
+    parser.add_argument("--max-claim-ratio", type=float, default=0.8)
+    parser.add_argument("--window-days", type=int, default=365)
+    parser.add_argument("--as-of", type=datetime.fromisoformat, default=None, help="Back-test as of this date")
+    parser.add_argument("--output", default="risk_scores.json")
+    args = parser.parse_args(argv)
+
+    data_service = create_data_service(args.backend, args.data_dir, **shared_options(args.backend))
+    scores = RiskService(data_service).score_policyholders(
+        max_recent_claims=args.max_recent_claims,
+        max_claim_ratio=args.max_claim_ratio,
+        window_days=args.window_days,
+        as_of=args.as_of,
+        workers=args.workers,
+        shard_size=args.shard_size
+    )
+    with open(args.output, "w") as f:
+        json.dump(scores, f)
+    high_risk = sum(score["high_risk"] for score in scores)
+    print(f"Scored {len(scores)} policyholders, {high_risk} high risk, written to {args.output}")
+    return 0
+
 
-        return analysis 
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import json
+import os
+import shutil
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .records import POLICY_TYPE_CODES, STATUS_CODES, ClaimRecord, PolicyholderRecord, decode_date
+
+# Strings are stored as one NUL-separated UTF-8 blob so a column decodes in a single call
+SEPARATOR = "\x00"
+
+
+def _encode_strings(values: List[str]) -> np.ndarray:
+    return np.frombuffer(SEPARATOR.join(values).encode("utf-8"), dtype=np.uint8)
+
+
+def _decode_strings(blob: np.ndarray, count: int) -> List[str]:
+    if count == 0:
+        return []
+    return blob.tobytes().decode("utf-8").split(SEPARATOR)
+
+
+def _encode_dates(values: List) -> np.ndarray:
+    """Record date values (epoch microseconds, or unencoded strings) to int64 microseconds"""
+    if all(type(value) is int for value in values):
+        return np.array(values, dtype=np.int64)
+    dates = pd.to_datetime(pd.Series([str(decode_date(value)) for value in values], dtype=object),
+                           format="ISO8601")
+    return dates.values.astype("datetime64[us]").astype(np.int64)
+
+
+def _encode_codes(values: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """Small integer codes plus the table of distinct values"""
+    table: Dict[str, int] = {}
+    codes = np.fromiter((table.setdefault(v, len(table)) for v in values), dtype=np.int8, count=len(values))
+    return codes, list(table)
+
+
+def write_snapshot(path: str, policyholders: Dict[str, PolicyholderRecord], claims: Dict[str, ClaimRecord],
+                   source_signature: list) -> bool:
+    """Write policyholders and claims as .npy columns under path.
+
+    source_signature identifies the JSON files the snapshot mirrors, so a
+    snapshot left behind by an older or external write is never trusted.
+    Returns False (and writes nothing) if a record does not fit the columns.
+    """
+    ph_records = list(policyholders.values())
+    claim_records = list(claims.values())
+    if any(p.extra for p in ph_records) or any(c.extra for c in claim_records):
+        return False
+
+    ph_index = {p.policyholder_id: i for i, p in enumerate(ph_records)}
+    ph_policy_codes, policy_types = _encode_codes([p.policy_type for p in ph_records])
+    status_codes, statuses = _encode_codes([c.status for c in claim_records])
+    columns = {
+        "ph_id": _encode_strings([p.policyholder_id for p in ph_records]),
+        "ph_name": _encode_strings([p.name for p in ph_records]),
+        "ph_age": np.array([p.age for p in ph_records], dtype=np.int16),
+        "ph_policy_type": ph_policy_codes,
+        "ph_sum_insured": np.array([p.sum_insured for p in ph_records], dtype=np.float64),
+        "ph_registration_date": _encode_dates([p.registration_value for p in ph_records]),
+        "claim_id": _encode_strings([c.claim_id for c in claim_records]),
+        "claim_policyholder_id": _encode_strings([c.policyholder_id for c in claim_records]),
+        "claim_policyholder_index": np.array(
+            [ph_index.get(c.policyholder_id, -1) for c in claim_records], dtype=np.int64
+        ),
+        "claim_amount": np.array([c.claim_amount for c in claim_records], dtype=np.float64),
+        "claim_reason": _encode_strings([c.reason for c in claim_records]),
+        "claim_status": status_codes,
+        "claim_date": _encode_dates([c.date_value for c in claim_records])
+    }
+    meta = {
+        "policyholder_count": len(ph_records),
+        "claim_count": len(claim_records),
+        "policy_types": policy_types,
+        "statuses": statuses,
+        "source": source_signature
+    }
+
+    tmp_path = f"{path}.tmp"
+    old_path = f"{path}.old"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, column in columns.items():
+        np.save(f"{tmp_path}/{name}.npy", column)
+    # meta.json goes last: a snapshot directory without it is incomplete
+    with open(f"{tmp_path}/meta.json", "w") as f:
+        json.dump(meta, f)
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return True
+
+
+def read_snapshot(path: str, source_signature: list) -> Optional[dict]:
+    """Read a snapshot's columns if it mirrors the given JSON file signature"""
+    try:
+        with open(f"{path}/meta.json", "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta["source"] != [list(s) if s else None for s in source_signature]:
+        return None
+    columns = {
+        name[:-4]: np.load(f"{path}/{name}")
+        for name in os.listdir(path) if name.endswith(".npy")
+    }
+    return {"meta": meta, "columns": columns}
+
+
+def snapshot_records(snapshot: dict) -> Tuple[Dict[str, PolicyholderRecord], Dict[str, ClaimRecord]]:
+    """Rebuild the policyholder and claim records from snapshot columns.
+
+    Dates are already epoch microseconds and codes only need remapping, so
+    nothing is parsed or formatted per record.
+    """
+    meta, columns = snapshot["meta"], snapshot["columns"]
+    ph_count, claim_count = meta["policyholder_count"], meta["claim_count"]
+
+    policy_type_codes = [POLICY_TYPE_CODES.code(policy_type) for policy_type in meta["policy_types"]]
+    policyholders = {}
+    for ph_id, name, age, code, sum_insured, registered in zip(
+        _decode_strings(columns["ph_id"], ph_count),
+        _decode_strings(columns["ph_name"], ph_count),
+        columns["ph_age"].tolist(),
+        columns["ph_policy_type"].tolist(),
+        columns["ph_sum_insured"].tolist(),
+        columns["ph_registration_date"].tolist()
+    ):
+        policyholder = PolicyholderRecord(ph_id, name, age, policy_type_codes[code], sum_insured, registered)
+        policyholders[policyholder.policyholder_id] = policyholder
+
+    status_codes = [STATUS_CODES.code(status) for status in meta["statuses"]]
+    claims = {}
+    for claim_id, policyholder_id, amount, reason, code, date_of_claim in zip(
+        _decode_strings(columns["claim_id"], claim_count),
+        _decode_strings(columns["claim_policyholder_id"], claim_count),
+        columns["claim_amount"].tolist(),
+        _decode_strings(columns["claim_reason"], claim_count),
+        columns["claim_status"].tolist(),
+        columns["claim_date"].tolist()
+    ):
+        claims[claim_id] = ClaimRecord(claim_id, policyholder_id, amount, reason, status_codes[code], date_of_claim)
+    return policyholders, claims
+
+
+def snapshot_claims_frame(snapshot: dict, claims: Dict[str, ClaimRecord]) -> pd.DataFrame:
+    """Build the DataService claims frame straight from snapshot columns.
+
+    Dates and categoricals come from the stored epochs and codes, so nothing
+    is parsed; string columns reuse the objects already held in claims.
+    """
+    meta, columns = snapshot["meta"], snapshot["columns"]
+    records = list(claims.values())
+    ph_index = np.asarray(columns["claim_policyholder_index"])
+    # A trailing -1 makes unknown policyholders (index -1) map to a missing category
+    policy_lookup = np.append(np.asarray(columns["ph_policy_type"], dtype=np.int64), -1)
+    policy_codes = policy_lookup[ph_index]
+    return pd.DataFrame({
+        "claim_id": [c.claim_id for c in records],
+        "policyholder_id": [c.policyholder_id for c in records],
+        "claim_amount": np.asarray(columns["claim_amount"]),
+        "reason": [c.reason for c in records],
+        "status": pd.Categorical.from_codes(np.asarray(columns["claim_status"]), meta["statuses"]),
+        "date_of_claim": np.asarray(columns["claim_date"]).astype("datetime64[us]").astype("datetime64[ns]"),
+        "policy_type": pd.Categorical.from_codes(policy_codes, meta["policy_types"])
+    })
@@ -0,0 +1,420 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import date
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import pandas as pd
+from .data_service import CHANGE_FEED_SIZE, DataService, _to_record, is_partitioned
+from .instrumentation import instrument_class
+from .quantile_sketch import QuantileSketch
+from .storage_backend import (CLAIM_SORT_FIELDS, POLICYHOLDER_SORT_FIELDS, StorageBackend, date_key, follows,
+                              next_month)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS policyholders (
+    policyholder_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    policy_type TEXT NOT NULL,
+    sum_insured REAL NOT NULL,
+    registration_date TEXT
+);
+CREATE TABLE IF NOT EXISTS claims (
+    claim_id TEXT PRIMARY KEY,
+    policyholder_id TEXT NOT NULL,
+    claim_amount REAL NOT NULL,
+    reason TEXT NOT NULL,
+    status TEXT NOT NULL,
+    date_of_claim TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_claims_policyholder ON claims (policyholder_id);
+CREATE INDEX IF NOT EXISTS idx_claims_status ON claims (status);
+CREATE INDEX IF NOT EXISTS idx_claims_date ON claims (date_of_claim);
+CREATE INDEX IF NOT EXISTS idx_claims_date_id ON claims (date_of_claim, claim_id);
+CREATE INDEX IF NOT EXISTS idx_claims_amount ON claims (claim_amount);
+CREATE INDEX IF NOT EXISTS idx_claims_status_date ON claims (status, date_of_claim);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    record TEXT NOT NULL
+);
+"""
+
+POLICYHOLDER_COLUMNS = ["policyholder_id", "name", "age", "policy_type", "sum_insured", "registration_date"]
+CLAIM_COLUMNS = ["claim_id", "policyholder_id", "claim_amount", "reason", "status", "date_of_claim"]
+
+INSERT_POLICYHOLDER = (
+    f"INSERT OR REPLACE INTO policyholders ({', '.join(POLICYHOLDER_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in POLICYHOLDER_COLUMNS)})"
+)
+INSERT_CLAIM = (
+    f"INSERT OR REPLACE INTO claims ({', '.join(CLAIM_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in CLAIM_COLUMNS)})"
+)
+
+AGGREGATE_COLUMNS = """
+    COUNT(*) AS count,
+    SUM(c.claim_amount) AS total,
+    MAX(c.claim_amount) AS max,
+    SUM(c.status = 'Pending') AS pending
+"""
+
+
+def _row(record: dict, columns: List[str]) -> Tuple:
+    """Column values of a record in table order"""
+    return tuple(record.get(column) for column in columns)
+
+
+@instrument_class
+class SqliteDataService(StorageBackend):
+    """SQLite storage backend that pushes lookups and grouping down to SQL"""
+
+    def __init__(self, db_path: str = "data/insurance.db"):
+        self.db_path = db_path
+        self.version = 0
+        self._claims_frame: Optional[pd.DataFrame] = None
+        self._claims_frame_version = -1
+        # Unfiltered amount sketches by name, with the version they were built at
+        self._sketches: Dict[str, Tuple[int, Dict[str, QuantileSketch]]] = {}
+        self._lock = threading.RLock()
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        # Streamlit serves sessions from several threads; the lock serialises access
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._data_version = self._read_data_version()
+
+    def _read_data_version(self) -> int:
+        """SQLite's counter of commits made by other connections"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[dict]:
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def _scalar(self, sql: str, params: Tuple = ()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchone()[0]
+
+    def _execute_many(self, sql: str, rows: List[Tuple], changes: List[dict]):
+        """Run a batch of writes and log their change records in a single transaction"""
+        with self._lock:
+            with self.conn:
+                self.conn.executemany(sql, rows)
+                self._log_changes(changes)
+            self.version += 1
+
+    def _execute(self, sql: str, params: Tuple, change: dict) -> int:
+        """Run a write in its own transaction and return the affected row count"""
+        with self._lock:
+            with self.conn:
+                cursor = self.conn.execute(sql, params)
+                if cursor.rowcount:
+                    self._log_changes([change])
+            self.version += 1
+            return cursor.rowcount
+
+    def _log_changes(self, changes: List[dict]):
+        """Append change records inside the current transaction, keeping the newest CHANGE_FEED_SIZE"""
+        self.conn.executemany("INSERT INTO changes (record) VALUES (?)",
+                              [(json.dumps(change, default=str),) for change in changes])
+        self.conn.execute("DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?", (CHANGE_FEED_SIZE,))
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the latest change committed by any connection"""
+        return self._scalar("SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'changes'), 0)")
+
+    def changes_since(self, seq: int) -> Optional[List[dict]]:
+        """Change records numbered above seq, oldest first, or None if some were trimmed"""
+        with self._lock:
+            # One read transaction, so the rows and the latest number agree
+            with self.conn:
+                self.conn.execute("BEGIN")
+                latest = self.sequence
+                rows = self.conn.execute("SELECT seq, record FROM changes WHERE seq > ? ORDER BY seq", (seq,)).fetchall()
+        changes = [dict(json.loads(record), seq=row_seq) for row_seq, record in rows]
+        return changes if seq <= latest and follows(changes, seq) and len(changes) == latest - seq else None
+
+    def close(self) -> bool:
+        """Close the database connection"""
+        with self._lock:
+            self.conn.close()
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """Invalidate cached views if another connection committed since we last looked"""
+        with self._lock:
+            data_version = self._read_data_version()
+            if data_version == self._data_version:
+                return False
+            self._data_version = data_version
+            self.version += 1
+            return True
+
+    def add_policyholder(self, policyholder_data: dict) -> str:
+        """Add a new policyholder"""
+        return self.add_policyholders([policyholder_data])[0]
+
+    def add_policyholders(self, policyholders: List[dict]) -> List[str]:
+        """Add a batch of policyholders in one transaction"""
+        records = [_to_record(p) for p in policyholders]
+        self._execute_many(INSERT_POLICYHOLDER, [_row(r, POLICYHOLDER_COLUMNS) for r in records],
+                           [{"op": "add_policyholder", "data": r} for r in records])
+        return [r["policyholder_id"] for r in records]
+
+    def get_policyholder(self, policyholder_id: str) -> Optional[dict]:
+        """Get policyholder by ID"""
+        rows = self._query("SELECT * FROM policyholders WHERE policyholder_id = ?", (policyholder_id,))
+        return rows[0] if rows else None
+
+    def get_all_policyholders(self) -> List[dict]:
+        """Get all policyholders"""
+        return self._query("SELECT * FROM policyholders ORDER BY rowid")
+
+    def count_policyholders(self) -> int:
+        """Count policyholders"""
+        return self._scalar("SELECT COUNT(*) FROM policyholders")
+
+    def add_claim(self, claim_data: dict) -> str:
+        """Add a new claim"""
+        return self.add_claims([claim_data])[0]
+
+    def add_claims(self, claims: List[dict]) -> List[str]:
+        """Add a batch of claims in one transaction"""
+        records = [_to_record(c) for c in claims]
+        self._execute_many(INSERT_CLAIM, [_row(r, CLAIM_COLUMNS) for r in records],
+                           [{"op": "add_claim", "data": r} for r in records])
+        return [r["claim_id"] for r in records]
+
+    def get_claim(self, claim_id: str) -> Optional[dict]:
+        """Get claim by ID"""
+        rows = self._query("SELECT * FROM claims WHERE claim_id = ?", (claim_id,))
+        return rows[0] if rows else None
+
+    def get_all_claims(self) -> List[dict]:
+        """Get all claims"""
+        return self._query("SELECT * FROM claims ORDER BY rowid")
+
+    def count_claims(self) -> int:
+        """Count claims"""
+        return self._scalar("SELECT COUNT(*) FROM claims")
+
+    def update_claim_status(self, claim_id: str, status: str) -> bool:
+        """Update claim status"""
+        status = getattr(status, "value", status)
+        return self._execute("UPDATE claims SET status = ? WHERE claim_id = ?", (status, claim_id),
+                             {"op": "update_claim_status", "claim_id": claim_id, "status": status}) > 0
+
+    def get_policyholder_claims(self, policyholder_id: str) -> List[dict]:
+        """Get all claims for a policyholder"""
+        return self._query("SELECT * FROM claims WHERE policyholder_id = ? ORDER BY rowid", (policyholder_id,))
+
+    def get_claims_by_status(self, status: str) -> List[dict]:
+        """Get all claims with the given status"""
+        return self._query("SELECT * FROM claims WHERE status = ? ORDER BY rowid", (status,))
+
+    def count_claims_by_status(self, status: str) -> int:
+        """Count claims with the given status"""
+        return self._scalar("SELECT COUNT(*) FROM claims WHERE status = ?", (status,))
+
+    def get_claims_by_month(self, month: str) -> List[dict]:
+        """Get all claims filed in a month, given as YYYY-MM"""
+        # A half-open range on the raw column lets SQLite use idx_claims_date
+        return self._query(
+            "SELECT * FROM claims WHERE date_of_claim >= ? AND date_of_claim < ? ORDER BY rowid",
+            (month, next_month(month))
+        )
+
+    def top_claims_by_amount(self, n: int = 10) -> List[dict]:
+        """The n largest claims by amount, largest first"""
+        return self._query("SELECT * FROM claims ORDER BY claim_amount DESC, claim_id DESC LIMIT ?", (max(n, 0),))
+
+    def get_claims_in_date_range(self, date_from: Optional[Union[date, str]] = None,
+                                 date_to: Optional[Union[date, str]] = None) -> List[dict]:
+        """Claims with date_from <= date_of_claim < date_to, oldest first"""
+        conditions = [("date_of_claim >= ?", date_key(date_from)), ("date_of_claim < ?", date_key(date_to))]
+        clauses = [clause for clause, value in conditions if value is not None]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._query(
+            f"SELECT * FROM claims {where} ORDER BY date_of_claim, claim_id",
+            tuple(value for _, value in conditions if value is not None)
+        )
+
+    def iter_claims(self, chunk_size: int = 10_000) -> Iterator[List[dict]]:
+        """All claims oldest first, one keyset-paged query per chunk"""
+        chunk = self._query("SELECT * FROM claims ORDER BY date_of_claim, claim_id LIMIT ?", (chunk_size,))
+        while chunk:
+            yield chunk
+            last = chunk[-1]
+            chunk = self._query(
+                "SELECT * FROM claims WHERE (date_of_claim, claim_id) > (?, ?) "
+                "ORDER BY date_of_claim, claim_id LIMIT ?",
+                (last["date_of_claim"], last["claim_id"], chunk_size)
+            )
+
+    def latest_claims_by_status(self, status: str, n: int = 10) -> List[dict]:
+        """The n most recent claims with the given status, newest first"""
+        return self._query(
+            "SELECT * FROM claims WHERE status = ? ORDER BY date_of_claim DESC, claim_id DESC LIMIT ?",
+            (status, max(n, 0))
+        )
+
+    def query_claims(self, status: Optional[str] = None, policyholder_id: Optional[str] = None,
+                     date_from: Optional[Union[date, str]] = None, date_to: Optional[Union[date, str]] = None,
+                     min_amount: Optional[float] = None, max_amount: Optional[float] = None,
+                     sort_by: str = "date_of_claim", descending: bool = True,
+                     offset: int = 0, limit: int = 50) -> Tuple[List[dict], int]:
+        """Filter, sort and page claims in SQL"""
+        if sort_by not in CLAIM_SORT_FIELDS:
+            raise ValueError(f"Cannot sort claims by {sort_by}")
+        conditions = [
+            ("status = ?", status),
+            ("policyholder_id = ?", policyholder_id),
+            ("date_of_claim >= ?", date_key(date_from)),
+            ("date_of_claim < ?", date_key(date_to)),
+            ("claim_amount >= ?", min_amount),
+            ("claim_amount <= ?", max_amount)
+        ]
+        return self._query_page("claims", conditions, sort_by, descending, offset, limit)
+
+    def query_policyholders(self, policy_type: Optional[str] = None, search: Optional[str] = None,
+                            sort_by: str = "policyholder_id", descending: bool = False,
+                            offset: int = 0, limit: int = 50) -> Tuple[List[dict], int]:
+        """Filter, sort and page policyholders in SQL"""
+        if sort_by not in POLICYHOLDER_SORT_FIELDS:
+            raise ValueError(f"Cannot sort policyholders by {sort_by}")
+        needle = search.strip() if search else None
+        conditions = [("policy_type = ?", policy_type)]
+        if needle:
+            conditions.append(("(policyholder_id LIKE ? || '%' OR instr(lower(name), lower(?)) > 0)", (needle, needle)))
+        return self._query_page("policyholders", conditions, sort_by, descending, offset, limit)
+
+    def _query_page(self, table: str, conditions: List[Tuple], sort_by: str, descending: bool,
+                    offset: int, limit: int) -> Tuple[List[dict], int]:
+        """Count matches and fetch one sorted page; conditions with a None value are skipped"""
+        clauses, params = [], []
+        for clause, value in conditions:
+            if value is None:
+                continue
+            clauses.append(clause)
+            params.extend(value if isinstance(value, tuple) else (value,))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        total = self._scalar(f"SELECT COUNT(*) FROM {table} {where}", tuple(params))
+        rows = self._query(
+            f"SELECT * FROM {table} {where} ORDER BY {sort_by} {'DESC' if descending else 'ASC'}, rowid "
+            "LIMIT ? OFFSET ?",
+            tuple(params) + (limit, offset)
+        )
+        return rows, total
+
+    def search_claim_ids(self, prefix: str, limit: int = 20) -> List[str]:
+        """Claim IDs starting with prefix, at most limit of them"""
+        rows = self._query(
+            "SELECT claim_id FROM claims WHERE claim_id LIKE ? || '%' ORDER BY rowid LIMIT ?",
+            (prefix.strip(), limit)
+        )
+        return [row["claim_id"] for row in rows]
+
+    def get_monthly_aggregates(self, date_from: Optional[Union[date, str]] = None,
+                               date_to: Optional[Union[date, str]] = None) -> Dict[str, dict]:
+        """Claim count, total, max and pending count per month, ordered by month"""
+        conditions = [("c.date_of_claim >= ?", date_key(date_from)), ("c.date_of_claim < ?", date_key(date_to))]
+        clauses = [clause for clause, value in conditions if value is not None]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._query(
+            f"SELECT substr(c.date_of_claim, 1, 7) AS key, {AGGREGATE_COLUMNS} "
+            f"FROM claims c {where} GROUP BY key ORDER BY key",
+            tuple(value for _, value in conditions if value is not None)
+        )
+        return {row.pop("key"): row for row in rows}
+
+    def get_policy_type_aggregates(self) -> Dict[str, dict]:
+        """Claim count, total, max and pending count per policy type"""
+        rows = self._query(
+            f"SELECT p.policy_type AS key, {AGGREGATE_COLUMNS} "
+            "FROM claims c JOIN policyholders p ON p.policyholder_id = c.policyholder_id "
+            "GROUP BY key ORDER BY MIN(c.rowid)"
+        )
+        return {row.pop("key"): row for row in rows}
+
+    def _amount_sketches(self, sql: str, params: Tuple = ()) -> Dict[str, QuantileSketch]:
+        """One sketch per key from (key, claim_amount) rows ordered by key"""
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return {
+            key: QuantileSketch.from_values(row[1] for row in group)
+            for key, group in groupby(rows, key=lambda row: row[0])
+        }
+
+    def _cached_sketches(self, name: str, sql: str) -> Dict[str, QuantileSketch]:
+        """Unfiltered sketches, rebuilt only when the data version changes; treat as read-only"""
+        with self._lock:
+            cached = self._sketches.get(name)
+            if cached is None or cached[0] != self.version:
+                cached = self._sketches[name] = (self.version, self._amount_sketches(sql))
+            return cached[1]
+
+    def get_monthly_amount_sketches(self, date_from: Optional[Union[date, str]] = None,
+                                    date_to: Optional[Union[date, str]] = None) -> Dict[str, QuantileSketch]:
+        """Claim amount sketch per month, ordered by month, from one scan of the claims"""
+        conditions = [("date_of_claim >= ?", date_key(date_from)), ("date_of_claim < ?", date_key(date_to))]
+        clauses = [clause for clause, value in conditions if value is not None]
+        sql = "SELECT substr(date_of_claim, 1, 7) AS month, claim_amount FROM claims {} ORDER BY month"
+        if not clauses:
+            return self._cached_sketches("monthly", sql.format(""))
+        return self._amount_sketches(
+            sql.format(f"WHERE {' AND '.join(clauses)}"),
+            tuple(value for _, value in conditions if value is not None)
+        )
+
+    def get_policy_type_amount_sketches(self) -> Dict[str, QuantileSketch]:
+        """Claim amount sketch per policy type, from one scan of the claims"""
+        return self._cached_sketches(
+            "policy_type",
+            "SELECT p.policy_type, c.claim_amount "
+            "FROM claims c JOIN policyholders p ON p.policyholder_id = c.policyholder_id ORDER BY p.policy_type"
+        )
+
+    def get_claims_frame(self) -> pd.DataFrame:
+        """Read-only columnar view of all claims joined with their policy type"""
+        with self._lock:
+            if self._claims_frame_version != self.version:
+                frame = pd.read_sql_query(
+                    "SELECT c.*, p.policy_type FROM claims c "
+                    "LEFT JOIN policyholders p ON p.policyholder_id = c.policyholder_id ORDER BY c.rowid",
+                    self.conn
+                )
+                frame["claim_amount"] = frame["claim_amount"].astype("float64")
+                frame["date_of_claim"] = pd.to_datetime(frame["date_of_claim"], format="ISO8601")
+                frame["status"] = frame["status"].astype("category")
+                frame["policy_type"] = frame["policy_type"].astype("category")
+                self._claims_frame = frame
+                self._claims_frame_version = self.version
+            return self._claims_frame
+
+
+def migrate_json_to_sqlite(data_dir: str = "data", db_path: Optional[str] = None) -> Tuple[int, int]:
+    """Copy the JSON store (snapshot or month partitions, plus journal) into an SQLite database.
+
+    Returns the number of policyholders and claims written.
+    """
+    source = DataService(data_dir, journal=True, partitioned=is_partitioned(data_dir))
+    target = SqliteDataService(db_path or f"{data_dir}/insurance.db")
+    policyholder_ids = target.add_policyholders(source.get_all_policyholders())
+    claim_ids = target.add_claims(source.get_all_claims())
+    target.close()
+    return len(policyholder_ids), len(claim_ids)
+
+
+if __name__ == "__main__":
+    # python -m services.sqlite_data_service [data_dir]
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else "data"
+    policyholder_count, claim_count = migrate_json_to_sqlite(data_dir)
+    print(f"Migrated {policyholder_count} policyholders and {claim_count} claims to {data_dir}/insurance.db")
@@ -0,0 +1,204 @@
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from .claim_timeline import claim_epoch
+from .quantile_sketch import QuantileSketch
+
+CLAIM_SORT_FIELDS = ["claim_id", "policyholder_id", "claim_amount", "status", "date_of_claim"]
+POLICYHOLDER_SORT_FIELDS = ["policyholder_id", "name", "age", "policy_type", "sum_insured", "registration_date"]
+
+
+def date_key(value: Optional[Union[date, str]]) -> Optional[str]:
+    """String form of a date bound, comparable with stored date_of_claim strings"""
+    return None if value is None else str(value)
+
+
+def next_month(month: str) -> str:
+    """The YYYY-MM string following the given one"""
+    year, month_number = int(month[:4]), int(month[5:7])
+    if month_number == 12:
+        return f"{year + 1:04d}-01"
+    return f"{year:04d}-{month_number + 1:02d}"
+
+
+def follows(changes: List[dict], seq: int) -> bool:
+    """Whether changes carry the sequence numbers seq + 1, seq + 2, ... with none missing"""
+    return all(change.get("seq") == seq + i for i, change in enumerate(changes, 1))
+
+
+class StorageBackend(ABC):
+    """Interface shared by every DataService storage backend.
+
+    RiskService, ReportService and the app only talk to this interface, so
+    they run unchanged against the JSON store or the SQLite store.
+    """
+
+    # Bumped whenever the stored data changes; derived views are cached against it
+    version: int = 0
+    # Sequence number of the latest mutation; see changes_since
+    sequence: int = 0
+
+    @abstractmethod
+    def reload_if_changed(self) -> bool:
+        """Pick up changes made by other writers; return True if anything changed"""
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every accepted mutation is durable; False if timeout expired or a write failed"""
+        return True
+
+    def close(self) -> bool:
+        """Make pending writes durable and release resources; False if some could not be written"""
+        return True
+
+    @abstractmethod
+    def changes_since(self, seq: int) -> Optional[List[dict]]:
+        """Mutation records with a sequence number above seq, oldest first.
+
+        Each record is {"op", "seq", ...} as written to the journal. Returns
+        None when some of those changes are no longer kept; the caller then
+        has to read the data afresh, noting sequence before it starts.
+        """
+
+    @abstractmethod
+    def add_policyholder(self, policyholder_data: dict) -> str:
+        """Add a new policyholder"""
+
+    @abstractmethod
+    def add_policyholders(self, policyholders: List[dict]) -> List[str]:
+        """Add a batch of policyholders with a single persist"""
+
+    @abstractmethod
+    def get_policyholder(self, policyholder_id: str) -> Optional[dict]:
+        """Get policyholder by ID"""
+
+    @abstractmethod
+    def get_all_policyholders(self) -> List[dict]:
+        """Get all policyholders"""
+
+    @abstractmethod
+    def count_policyholders(self) -> int:
+        """Count policyholders"""
+
+    @abstractmethod
+    def add_claim(self, claim_data: dict) -> str:
+        """Add a new claim"""
+
+    @abstractmethod
+    def add_claims(self, claims: List[dict]) -> List[str]:
+        """Add a batch of claims with a single persist"""
+
+    @abstractmethod
+    def get_claim(self, claim_id: str) -> Optional[dict]:
+        """Get claim by ID"""
+
+    @abstractmethod
+    def get_all_claims(self) -> List[dict]:
+        """Get all claims"""
+
+    @abstractmethod
+    def count_claims(self) -> int:
+        """Count claims"""
+
+    @abstractmethod
+    def update_claim_status(self, claim_id: str, status: str) -> bool:
+        """Update claim status"""
+
+    @abstractmethod
+    def get_policyholder_claims(self, policyholder_id: str) -> List[dict]:
+        """Get all claims for a policyholder"""
+
+    def get_policyholder_claim_epochs(self, policyholder_id: str) -> np.ndarray:
+        """Sorted whole-second epoch timestamps of a policyholder's claims"""
+        epochs = [claim_epoch(claim["date_of_claim"]) for claim in self.get_policyholder_claims(policyholder_id)]
+        return np.sort(np.array(epochs, dtype=np.int64))
+
+    @abstractmethod
+    def get_claims_by_status(self, status: str) -> List[dict]:
+        """Get all claims with the given status"""
+
+    @abstractmethod
+    def count_claims_by_status(self, status: str) -> int:
+        """Count claims with the given status"""
+
+    @abstractmethod
+    def get_claims_by_month(self, month: str) -> List[dict]:
+        """Get all claims filed in a month, given as YYYY-MM"""
+
+    @abstractmethod
+    def get_monthly_aggregates(self, date_from: Optional[Union[date, str]] = None,
+                               date_to: Optional[Union[date, str]] = None) -> Dict[str, dict]:
+        """Claim count, total, max and pending count per month, ordered by month.
+
+        With a date range only claims with date_from <= date_of_claim < date_to count.
+        """
+
+    @abstractmethod
+    def get_policy_type_aggregates(self) -> Dict[str, dict]:
+        """Claim count, total, max and pending count per policy type"""
+
+    @abstractmethod
+    def get_monthly_amount_sketches(self, date_from: Optional[Union[date, str]] = None,
+                                    date_to: Optional[Union[date, str]] = None) -> Dict[str, QuantileSketch]:
+        """Claim amount quantile sketch per month, ordered by month.
+
+        With a date range only claims with date_from <= date_of_claim < date_to
+        count. The sketches may be shared, so combine them with merge_sketches,
+        which leaves its inputs as they are.
+        """
+
+    @abstractmethod
+    def get_policy_type_amount_sketches(self) -> Dict[str, QuantileSketch]:
+        """Claim amount quantile sketch per policy type"""
+
+    @abstractmethod
+    def get_claims_frame(self) -> pd.DataFrame:
+        """Read-only columnar view of all claims joined with their policy type"""
+
+    @abstractmethod
+    def top_claims_by_amount(self, n: int = 10) -> List[dict]:
+        """The n largest claims by amount, largest first"""
+
+    @abstractmethod
+    def get_claims_in_date_range(self, date_from: Optional[Union[date, str]] = None,
+                                 date_to: Optional[Union[date, str]] = None) -> List[dict]:
+        """Claims with date_from <= date_of_claim < date_to, oldest first"""
+
+    @abstractmethod
+    def iter_claims(self, chunk_size: int = 10_000) -> Iterator[List[dict]]:
+        """All claims oldest first, in lists of at most chunk_size.
+
+        Each list is read when the iterator reaches it, so memory is bounded by
+        the chunk size rather than the number of claims.
+        """
+
+    @abstractmethod
+    def latest_claims_by_status(self, status: str, n: int = 10) -> List[dict]:
+        """The n most recent claims with the given status, newest first"""
+
+    @abstractmethod
+    def query_claims(self, status: Optional[str] = None, policyholder_id: Optional[str] = None,
+                     date_from: Optional[Union[date, str]] = None, date_to: Optional[Union[date, str]] = None,
+                     min_amount: Optional[float] = None, max_amount: Optional[float] = None,
+                     sort_by: str = "date_of_claim", descending: bool = True,
+                     offset: int = 0, limit: int = 50) -> Tuple[List[dict], int]:
+        """Filter, sort and page claims.
+
+        Dates match date_from <= date_of_claim < date_to and amounts are
+        inclusive. Returns one page of claims and the total number of matches.
+        """
+
+    @abstractmethod
+    def query_policyholders(self, policy_type: Optional[str] = None, search: Optional[str] = None,
+                            sort_by: str = "policyholder_id", descending: bool = False,
+                            offset: int = 0, limit: int = 50) -> Tuple[List[dict], int]:
+        """Filter, sort and page policyholders.
+
+        search matches an ID prefix or a case-insensitive part of the name.
+        Returns one page of policyholders and the total number of matches.
+        """
+
+    @abstractmethod
+    def search_claim_ids(self, prefix: str, limit: int = 20) -> List[str]:
+        """Claim IDs starting with prefix, at most limit of them"""
@@ -0,0 +1,109 @@
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+class WriteBehind:
+    """Background thread that persists queued mutation records in groups.
+
+    submit() queues records and returns at once. The thread waits until
+    max_delay seconds have passed since the oldest queued record, or until
+    max_records are queued, then passes everything queued so far to a single
+    write call. flush() blocks until every record submitted before it is written.
+
+    A batch whose write raises stays queued, ahead of newer records, and is
+    retried after max_delay; error holds the latest failure until a write succeeds.
+    """
+
+    def __init__(self, write: Callable[[List[dict]], None], max_delay: float = 0.2,
+                 max_records: int = 1000):
+        self._write = write
+        self.max_delay = max_delay
+        self.max_records = max_records
+        self._condition = threading.Condition()
+        self._pending: List[dict] = []
+        self._oldest = 0.0
+        # Records submitted and written so far; flush() waits for written to catch up
+        self._submitted = 0
+        self._written = 0
+        self._failures = 0
+        self.error: Optional[Exception] = None
+        self._flush_requested = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, records: List[dict]):
+        """Queue records for the next group write"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Write-behind queue is closed")
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.extend(records)
+            self._submitted += len(records)
+            self._condition.notify_all()
+
+    def pending(self) -> int:
+        """Number of submitted records not yet written"""
+        with self._condition:
+            return self._submitted - self._written
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write queued records now and wait for them; False if timeout expired or the write failed"""
+        with self._condition:
+            target = self._submitted
+            if self._written >= target:
+                return True
+            failures = self._failures
+            self._flush_requested = True
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: self._written >= target or self._failures > failures, timeout)
+            return self._written >= target
+
+    def close(self) -> bool:
+        """Write everything still queued and stop the thread; False if some records could not be written"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        return self.pending() == 0
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                # Let a burst of changes accumulate into one write
+                while len(self._pending) < self.max_records and not (self._closed or self._flush_requested):
+                    remaining = self._oldest + self.max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch, self._pending = self._pending, []
+                self._flush_requested = False
+
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"Error writing queued changes: {e}")
+                with self._condition:
+                    self._pending = batch + self._pending
+                    self._failures += 1
+                    self.error = e
+                    self._condition.notify_all()
+                    if self._closed:
+                        # Closing makes one last attempt; the records stay counted by pending()
+                        print(f"{len(self._pending)} queued changes were not written")
+                        return
+                    self._oldest = time.monotonic()
+                    self._condition.wait(self.max_delay)
+                continue
+
+            with self._condition:
+                self._written += len(batch)
+                self.error = None
+                self._condition.notify_all()
@@ -0,0 +1,31 @@
+import pytest
+from benchmarks.generator import generate_portfolio, write_portfolio
+
+
+def new_claim(claim_id, policyholder_id, date_of_claim="2025-06-15 10:00:00", amount=100.0, status="Pending"):
+    """A claim valid against the Claim model"""
+    return {
+        "claim_id": claim_id,
+        "policyholder_id": policyholder_id,
+        "claim_amount": amount,
+        "reason": "Test claim",
+        "status": status,
+        "date_of_claim": date_of_claim
+    }
+
+
+@pytest.fixture
+def portfolio():
+    return generate_portfolio(2000)
+
+
+@pytest.fixture
+def data_dir(tmp_path, portfolio):
+    """A data directory holding the generated portfolio as policyholders.json and claims.json"""
+    write_portfolio(str(tmp_path), *portfolio)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def policyholder_id(portfolio):
+    return next(iter(portfolio[0]))
@@ -0,0 +1,54 @@
+import csv
+import json
+import pytest
+from services import export_service, ingest, risk_service
+from services.data_service import create_data_service, shared_options
+from services.sqlite_data_service import migrate_json_to_sqlite
+from views.common import APP_OPTIONS
+from .conftest import new_claim
+
+BACKENDS = ["json", "partitioned", "sqlite"]
+
+
+def open_app_store(backend, data_dir):
+    """The store as the app opens it"""
+    return create_data_service(backend, data_dir, **shared_options(backend), **APP_OPTIONS.get(backend, {}))
+
+
+@pytest.fixture
+def store_dir(data_dir, request):
+    if request.param == "sqlite":
+        migrate_json_to_sqlite(data_dir)
+    return data_dir
+
+
+@pytest.mark.parametrize("backend, store_dir", [(b, b) for b in BACKENDS], indirect=["store_dir"])
+def test_app_and_clis_see_each_others_changes(backend, store_dir, policyholder_id, tmp_path):
+    app = open_app_store(backend, store_dir)
+    app.add_claims([new_claim(f"A{i}", policyholder_id, "2025-12-20 09:00:00") for i in range(5)])
+    assert app.flush(5)
+
+    claims_file = tmp_path / "claims.jsonl"
+    claims_file.write_text("".join(json.dumps(new_claim(f"I{i}", policyholder_id)) + "\n" for i in range(80)))
+    assert ingest.main(["claims", str(claims_file), "--backend", backend, "--data-dir", store_dir]) == 0
+
+    # The app picks up the ingest on its next rerun, without a restart
+    app.reload_if_changed()
+    assert app.get_claim("I79") is not None
+    expected = {c["claim_id"] for c in app.get_all_claims()}
+    assert {f"A{i}" for i in range(5)} | {f"I{i}" for i in range(80)} <= expected
+    assert app.close()
+
+    export_path = tmp_path / "export.csv"
+    assert export_service.main(["--backend", backend, "--data-dir", store_dir, "--output", str(export_path)]) == 0
+    with open(export_path, newline="") as f:
+        assert {row["claim_id"] for row in csv.DictReader(f)} == expected
+
+    scores_path = tmp_path / "scores.json"
+    assert risk_service.main(["--backend", backend, "--data-dir", store_dir, "--workers", "1",
+                              "--output", str(scores_path)]) == 0
+    with open(scores_path) as f:
+        scores = {score["policyholder_id"]: score for score in json.load(f)}
+    reopened = open_app_store(backend, store_dir)
+    assert scores[policyholder_id]["claim_count"] == len(reopened.get_policyholder_claims(policyholder_id))
+    reopened.close()
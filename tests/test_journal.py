@@ -0,0 +1,76 @@
+import os
+import services.data_service as data_service_module
+from services.data_service import DataService
+from .conftest import new_claim
+
+
+def test_replay_restores_changes_not_yet_saved(data_dir, policyholder_id):
+    store = DataService(data_dir, journal=True)
+    claim_id = next(iter(store.claims))
+    store.add_claim(new_claim("T1", policyholder_id))
+    store.update_claim_status(claim_id, "Rejected")
+
+    assert "T1" not in DataService(data_dir).claims
+    reopened = DataService(data_dir, journal=True)
+    assert reopened.get_claim("T1")["status"] == "Pending"
+    assert reopened.get_claim(claim_id)["status"] == "Rejected"
+    assert reopened.sequence == store.sequence
+    assert reopened.get_monthly_aggregates() == store.get_monthly_aggregates()
+
+
+def test_compaction_folds_the_journal_into_the_json_files(data_dir, policyholder_id):
+    store = DataService(data_dir, journal=True, compact_threshold=1)
+    store.add_claim(new_claim("T1", policyholder_id))
+
+    records, _ = store.journal.read_from(0)
+    assert [record["op"] for record in records] == ["checkpoint"]
+    assert "T1" in DataService(data_dir).claims
+    assert DataService(data_dir, journal=True).sequence == store.sequence
+
+
+def test_failed_compaction_keeps_the_journal(data_dir, policyholder_id, monkeypatch):
+    store = DataService(data_dir, journal=True)
+    store.add_claim(new_claim("T1", policyholder_id))
+
+    def fail(path, data):
+        raise OSError("disk full")
+    monkeypatch.setattr(data_service_module, "_atomic_write_json", fail)
+    store.compact()
+    monkeypatch.undo()
+
+    assert store.journal.size() > 0
+    assert "T1" in DataService(data_dir, journal=True).claims
+
+
+def test_compaction_keeps_another_writers_records(data_dir, policyholder_id):
+    app = DataService(data_dir, journal=True, compact_threshold=1000)
+    ingest = DataService(data_dir, journal=True)
+    ingest.add_claims([new_claim(f"I{i}", policyholder_id) for i in range(80)])
+    app.add_claims([new_claim(f"A{i}", policyholder_id) for i in range(20)])
+
+    reopened = DataService(data_dir, journal=True)
+    assert all(f"I{i}" in reopened.claims for i in range(80))
+    assert all(f"A{i}" in reopened.claims for i in range(20))
+
+
+def test_reload_applies_only_the_journal_tail(data_dir, policyholder_id):
+    reader = DataService(data_dir, journal=True)
+    writer = DataService(data_dir, journal=True)
+    writer.add_claim(new_claim("T1", policyholder_id))
+
+    assert reader.reload_if_changed()
+    assert reader.get_claim("T1") is not None
+    assert reader.changes_since(reader.sequence - 1)[0]["data"]["claim_id"] == "T1"
+    assert not reader.reload_if_changed()
+
+
+def test_torn_trailing_write_is_ignored(data_dir, policyholder_id):
+    store = DataService(data_dir, journal=True)
+    store.add_claim(new_claim("T1", policyholder_id))
+    with open(store.journal.path, "a") as f:
+        f.write('{"op": "add_claim", "data": {"claim_id": "T2"')
+
+    reopened = DataService(data_dir, journal=True)
+    assert "T1" in reopened.claims
+    assert "T2" not in reopened.claims
+    assert os.path.getsize(store.journal.path) > 0
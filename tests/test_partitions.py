@@ -0,0 +1,120 @@
+import json
+import os
+import pytest
+from services.data_service import DataService
+from services.sqlite_data_service import migrate_json_to_sqlite
+from .conftest import new_claim
+
+
+def partitioned(data_dir):
+    return DataService(data_dir, journal=True, partitioned=True)
+
+
+def assert_same_aggregates(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, values in expected.items():
+        # Totals summed in a different order may differ in the last bits
+        assert actual[key] == pytest.approx(values)
+
+
+def assert_same_totals(store, reference):
+    assert store.count_claims() == reference.count_claims()
+    assert store.count_claims_by_status("Pending") == reference.count_claims_by_status("Pending")
+    assert_same_aggregates(store.get_monthly_aggregates(), reference.get_monthly_aggregates())
+    assert_same_aggregates(store.get_policy_type_aggregates(), reference.get_policy_type_aggregates())
+
+
+def test_first_start_splits_claims_json_into_months(data_dir, portfolio):
+    store = partitioned(data_dir)
+
+    assert not os.path.exists(f"{data_dir}/claims.json")
+    months = {name[:-5] for name in os.listdir(f"{data_dir}/claims") if name[:4].isdigit()}
+    assert months == set(store.get_monthly_aggregates())
+    with open(f"{data_dir}/claims/index.json") as f:
+        assert len(json.load(f)) == len(portfolio[1])
+
+
+def test_partitioned_store_cannot_be_opened_as_plain_json(data_dir):
+    partitioned(data_dir)
+    with pytest.raises(ValueError):
+        DataService(data_dir, journal=True)
+
+
+def test_totals_need_no_claim_files(data_dir):
+    reference = DataService(data_dir, journal=True)
+    partitioned(data_dir)
+
+    store = partitioned(data_dir)
+    assert_same_totals(store, reference)
+    assert store._partial
+    assert store._partitions == {}
+
+
+def test_writes_read_only_the_owning_month(tmp_path, data_dir, policyholder_id):
+    reference_dir = tmp_path / "reference"
+    reference_dir.mkdir()
+    for name in ("policyholders.json", "claims.json"):
+        (reference_dir / name).write_bytes(open(f"{data_dir}/{name}", "rb").read())
+    reference = DataService(str(reference_dir), journal=True)
+    partitioned(data_dir)
+    store = partitioned(data_dir)
+    existing = next(iter(reference.claims))
+
+    for target in (store, reference):
+        target.add_claim(new_claim("T1", policyholder_id, "2030-05-01 00:00:00"))
+        target.update_claim_status(existing, "Rejected")
+        target.add_claim(new_claim("T1", policyholder_id, "2031-01-01 00:00:00", amount=1e9))
+
+    assert store._partial
+    assert set(store._partitions) <= {"2030-05", "2031-01", reference.claims[existing].month()}
+    # Re-adding T1 under another date moved it out of its first month
+    assert "2030-05" not in store.get_monthly_aggregates()
+    assert_same_totals(store, reference)
+
+    # Replayed from the journal without loading every month
+    replayed = partitioned(data_dir)
+    assert replayed._partial
+    assert replayed.get_claim("T1")["claim_amount"] == 1e9
+    assert_same_totals(replayed, reference)
+
+    replayed.compact()
+    compacted = partitioned(data_dir)
+    assert_same_totals(compacted, reference)
+    assert compacted.get_claim(existing)["status"] == "Rejected"
+    compacted._load_all_partitions()
+    assert {c["claim_id"]: c for c in compacted.get_all_claims()} == {c["claim_id"]: c for c in reference.get_all_claims()}
+
+
+def test_save_rewrites_only_changed_months(data_dir, policyholder_id):
+    partitioned(data_dir)
+    store = partitioned(data_dir)
+    before = {name: os.stat(f"{data_dir}/claims/{name}").st_mtime_ns for name in os.listdir(f"{data_dir}/claims")}
+
+    store.add_claim(new_claim("T1", policyholder_id, "2030-05-01 00:00:00"))
+    store.compact()
+
+    after = {name: os.stat(f"{data_dir}/claims/{name}").st_mtime_ns for name in os.listdir(f"{data_dir}/claims")}
+    changed = {name for name in after if before.get(name) != after[name]}
+    assert changed == {"2030-05.json", "index.json", "manifest.json"}
+
+
+def test_policy_type_change_moves_claims_between_totals(data_dir, policyholder_id):
+    partitioned(data_dir)
+    store = partitioned(data_dir)
+    policyholder = store.get_policyholder(policyholder_id)
+    new_type = next(t for t in ("Auto", "Home", "Life", "Health") if t != policyholder["policy_type"])
+    before = store.get_policy_type_aggregates()
+
+    store.add_policyholder({**policyholder, "policy_type": new_type})
+    moved = len(store.get_policyholder_claims(policyholder_id))
+
+    after = store.get_policy_type_aggregates()
+    assert after[new_type]["count"] == before.get(new_type, {"count": 0})["count"] + moved
+    store.compact()
+    assert_same_aggregates(partitioned(data_dir).get_policy_type_aggregates(), after)
+
+
+def test_migration_reads_the_month_files(data_dir, portfolio):
+    partitioned(data_dir)
+    policyholders, claims = migrate_json_to_sqlite(data_dir)
+    assert (policyholders, claims) == (len(portfolio[0]), len(portfolio[1]))
@@ -0,0 +1,71 @@
+import services.journal as journal_module
+from services.data_service import DataService
+from services.write_behind import WriteBehind
+from .conftest import new_claim
+
+
+class FlakyWriter:
+    def __init__(self):
+        self.failing = False
+        self.batches = []
+
+    def __call__(self, records):
+        if self.failing:
+            raise OSError("disk full")
+        self.batches.append(list(records))
+
+
+def test_flush_writes_queued_records_in_one_batch():
+    write = FlakyWriter()
+    writer = WriteBehind(write, max_delay=10)
+    writer.submit([{"seq": 1}])
+    writer.submit([{"seq": 2}, {"seq": 3}])
+
+    assert writer.flush(5)
+    assert write.batches == [[{"seq": 1}, {"seq": 2}, {"seq": 3}]]
+    assert writer.close()
+
+
+def test_failed_write_is_kept_and_retried():
+    write = FlakyWriter()
+    write.failing = True
+    writer = WriteBehind(write, max_delay=0.01)
+    writer.submit([{"seq": 1}])
+
+    assert not writer.flush(5)
+    assert writer.pending() == 1
+    assert isinstance(writer.error, OSError)
+
+    writer.submit([{"seq": 2}])
+    write.failing = False
+    assert writer.flush(5)
+    assert writer.pending() == 0
+    assert writer.error is None
+    assert [record["seq"] for batch in write.batches for record in batch] == [1, 2]
+    assert writer.close()
+
+
+def test_close_reports_records_it_could_not_write():
+    write = FlakyWriter()
+    write.failing = True
+    writer = WriteBehind(write, max_delay=10)
+    writer.submit([{"seq": 1}])
+
+    assert not writer.close()
+    assert writer.pending() == 1
+
+
+def test_data_service_flush_reports_journal_failures(data_dir, policyholder_id, monkeypatch):
+    store = DataService(data_dir, journal=True, write_behind=True, flush_interval_ms=10)
+    append_many = journal_module.Journal.append_many
+
+    def fail(self, records):
+        raise OSError("disk full")
+    monkeypatch.setattr(journal_module.Journal, "append_many", fail)
+    store.add_claim(new_claim("T1", policyholder_id))
+    assert not store.flush(5)
+
+    monkeypatch.setattr(journal_module.Journal, "append_many", append_many)
+    assert store.flush(5)
+    assert store.close()
+    assert "T1" in DataService(data_dir, journal=True).claims
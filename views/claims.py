@@ -0,0 +1,91 @@
+import streamlit as st
+import pandas as pd
+from datetime import timedelta
+from models.claim import Claim, ClaimStatus
+from services.storage_backend import CLAIM_SORT_FIELDS
+from services.instrumentation import timed
+from .common import format_currency, get_services, page_controls, query_page
+
+def render():
+    data_service, _, _, _ = get_services()
+    st.title("Claim Management")
+
+    tab1, tab2 = st.tabs(["Submit Claim", "View Claims"])
+
+    with tab1:
+        with timed("Claim Management: Submit Claim"):
+            st.subheader("Submit New Claim")
+            policyholder_search = st.text_input("Search Policyholder", placeholder="ID or name")
+            matches, _ = data_service.query_policyholders(search=policyholder_search or None, limit=50)
+            with st.form("submit_claim"):
+                policyholder_id = st.selectbox(
+                    "Policyholder ID",
+                    options=[p['policyholder_id'] for p in matches]
+                )
+                claim_amount = st.number_input("Claim Amount", min_value=0.0)
+                reason = st.text_area("Reason")
+
+                if st.form_submit_button("Submit Claim"):
+                    try:
+                        claim_id = f"CL{data_service.count_claims() + 1:03d}"
+                        claim = Claim(
+                            claim_id=claim_id,
+                            policyholder_id=policyholder_id,
+                            claim_amount=claim_amount,
+                            reason=reason
+                        )
+                        data_service.add_claim(claim.dict())
+                        st.success(f"Claim submitted successfully! ID: {claim_id}")
+                    except Exception as e:
+                        st.error(f"Error: {str(e)}")
+
+    with tab2:
+        with timed("Claim Management: View Claims"):
+            st.subheader("View Claims")
+            col1, col2, col3, col4 = st.columns(4)
+            status_filter = col1.selectbox("Status", ["All"] + [s.value for s in ClaimStatus])
+            policyholder_filter = col2.text_input("Policyholder ID")
+            date_from = col3.date_input("From Date", value=None)
+            date_to = col4.date_input("To Date", value=None)
+            col1, col2, col3, col4 = st.columns(4)
+            min_amount = col1.number_input("Min Amount", min_value=0.0, value=None)
+            max_amount = col2.number_input("Max Amount", min_value=0.0, value=None)
+            sort_by = col3.selectbox("Sort By", CLAIM_SORT_FIELDS, index=CLAIM_SORT_FIELDS.index("date_of_claim"))
+            descending = col4.checkbox("Descending", value=True)
+
+            claims, total = query_page("claims", lambda offset, limit: data_service.query_claims(
+                status=None if status_filter == "All" else status_filter,
+                policyholder_id=policyholder_filter.strip() or None,
+                date_from=date_from,
+                date_to=date_to + timedelta(days=1) if date_to else None,
+                min_amount=min_amount,
+                max_amount=max_amount,
+                sort_by=sort_by,
+                descending=descending,
+                offset=offset,
+                limit=limit
+            ))
+            if claims:
+                df = pd.DataFrame(claims)
+                df['claim_amount'] = df['claim_amount'].apply(format_currency)
+                st.dataframe(df)
+                page_controls("claims", total)
+            else:
+                st.info("No claims found")
+
+            if data_service.count_claims():
+                # Claim Status Update
+                st.subheader("Update Claim Status")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    claim_search = st.text_input("Search Claim ID", placeholder="e.g. CL001")
+                with col2:
+                    selected_claim = st.selectbox("Select Claim ID", options=data_service.search_claim_ids(claim_search))
+                with col3:
+                    new_status = st.selectbox("New Status", options=[s.value for s in ClaimStatus])
+
+                if st.button("Update Status"):
+                    if selected_claim and data_service.update_claim_status(selected_claim, new_status):
+                        st.success("Claim status updated successfully!")
+                    else:
+                        st.error("Failed to update claim status")
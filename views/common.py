@@ -0,0 +1,64 @@
+import math
+import os
+import tempfile
+import streamlit as st
+import pandas as pd
+from services.data_service import create_data_service, shared_options
+from services.risk_service import RiskService
+from services.report_service import ReportService
+from services.dashboard_service import DashboardService
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Per-process options on top of shared_options: the snapshot and write-behind only
+# change how this process loads and persists, not what other processes see
+APP_OPTIONS = {
+    "json": {"binary_snapshot": True, "write_behind": True},
+    "partitioned": {"write_behind": True}
+}
+
+# Initialize services once per process; every session and rerun shares them
+@st.cache_resource(show_spinner=False)
+def get_services():
+    # STORAGE_BACKEND=sqlite switches to data/insurance.db (see services/sqlite_data_service.py),
+    # STORAGE_BACKEND=partitioned to month files under data/claims/
+    backend = os.environ.get("STORAGE_BACKEND", "json")
+    data_service = create_data_service(backend, **shared_options(backend), **APP_OPTIONS.get(backend, {}))
+    risk_service = RiskService(data_service)
+    report_service = ReportService(data_service)
+    return data_service, risk_service, report_service, DashboardService(data_service, risk_service, report_service)
+
+@st.cache_resource(show_spinner=False)
+def get_export_dir():
+    """Per-process directory holding prepared claim exports"""
+    return tempfile.mkdtemp(prefix="insurance-exports-")
+
+def format_currency(amount):
+    return f"${amount:,.2f}"
+
+def query_page(key, query):
+    """Run a paged query for the page selected in the controls under the table"""
+    page_size = st.session_state.get(f"{key}_page_size", PAGE_SIZES[1])
+    page_number = st.session_state.get(f"{key}_page", 1)
+    rows, total = query(offset=(page_number - 1) * page_size, limit=page_size)
+    pages = max(1, math.ceil(total / page_size))
+    if page_number > pages:
+        # Filters narrowed the result set; jump back to its last page
+        st.session_state[f"{key}_page"] = page_number = pages
+        rows, total = query(offset=(page_number - 1) * page_size, limit=page_size)
+    return rows, total
+
+def page_controls(key, total):
+    """Page size and page number inputs for a table filled by query_page"""
+    page_size = st.session_state.get(f"{key}_page_size", PAGE_SIZES[1])
+    pages = max(1, math.ceil(total / page_size))
+    col1, col2, col3 = st.columns(3)
+    col1.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(page_size), key=f"{key}_page_size")
+    col2.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    first = (st.session_state.get(f"{key}_page", 1) - 1) * page_size
+    col3.caption(f"Showing {first + 1:,}–{min(first + page_size, total):,} of {total:,} (page {first // page_size + 1} of {pages})")
+
+def download_csv(rows, file_name):
+    """Download button for the raw values behind a report table"""
+    st.download_button("Download CSV", pd.DataFrame(rows).to_csv(index=False), file_name=file_name,
+                       mime="text/csv", key=f"download_{file_name}")
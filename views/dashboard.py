@@ -0,0 +1,62 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from services.report_service import PERCENTILES
+from services.instrumentation import timed
+from .common import get_services
+
+def render():
+    _, _, _, dashboard_service = get_services()
+    st.title("Insurance Management Dashboard")
+
+    # Cached per data version, so reruns and repeat visits skip the computation
+    with timed("Dashboard: Snapshot"):
+        snapshot = dashboard_service.get_snapshot()
+
+    # Key metrics
+    with timed("Dashboard: Key metrics"):
+        col1, col2, col3, col4 = st.columns(4)
+
+        col1.metric("Total Policyholders", snapshot.total_policyholders)
+        col2.metric("Total Claims", snapshot.total_claims)
+        col3.metric("Pending Claims", snapshot.pending_claims)
+        col4.metric("High Risk Policyholders", snapshot.high_risk_policyholders)
+
+    # Claims by Policy Type
+    with timed("Dashboard: Claims by Policy Type"):
+        st.subheader("Claims by Policy Type")
+        policy_analysis = snapshot.policy_types
+        if policy_analysis:
+            fig = px.pie(
+                values=[data['total_claims'] for data in policy_analysis.values()],
+                names=list(policy_analysis.keys()),
+                title="Distribution of Claims by Policy Type"
+            )
+            st.plotly_chart(fig)
+
+    # Monthly Claims Trend
+    with timed("Dashboard: Monthly Claims Trend"):
+        st.subheader("Monthly Claims Trend")
+        monthly_claims = snapshot.monthly_trend
+        if monthly_claims:
+            df = pd.DataFrame(monthly_claims)
+            fig = px.line(
+                df,
+                x='month',
+                y=['total_claims', 'average_amount'],
+                title="Monthly Claims Trend"
+            )
+            st.plotly_chart(fig)
+
+    # Claim Amount Percentiles
+    with timed("Dashboard: Claim Amount Percentiles"):
+        st.subheader("Claim Amount Percentiles")
+        monthly_percentiles = snapshot.monthly_percentiles
+        if monthly_percentiles:
+            fig = px.line(
+                pd.DataFrame(monthly_percentiles),
+                x='month',
+                y=list(PERCENTILES),
+                title="Median, p90 and p99 Claim Amount by Month"
+            )
+            st.plotly_chart(fig)
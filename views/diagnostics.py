@@ -0,0 +1,30 @@
+import streamlit as st
+import pandas as pd
+from services import instrumentation
+
+def render():
+    st.title("Diagnostics")
+
+    enabled = st.toggle("Enable instrumentation", value=instrumentation.is_enabled())
+    if enabled != instrumentation.is_enabled():
+        instrumentation.enable() if enabled else instrumentation.disable()
+
+    stats = instrumentation.get_stats()
+    if stats:
+        df = pd.DataFrame(stats).T.sort_values('total_ms', ascending=False)
+        st.dataframe(df.style.format({'total_ms': '{:.2f}', 'mean_ms': '{:.2f}', 'p95_ms': '{:.2f}'}))
+    else:
+        st.info("No timings recorded yet. Enable instrumentation and browse the other pages.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "Download JSON",
+            data=instrumentation.dump_json(),
+            file_name="diagnostics.json",
+            mime="application/json"
+        )
+    with col2:
+        if st.button("Reset"):
+            instrumentation.reset()
+            st.rerun()
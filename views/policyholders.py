@@ -0,0 +1,61 @@
+import streamlit as st
+import pandas as pd
+from models.policyholder import Policyholder, PolicyType
+from services.storage_backend import POLICYHOLDER_SORT_FIELDS
+from services.instrumentation import timed
+from .common import format_currency, get_services, page_controls, query_page
+
+def render():
+    data_service, _, _, _ = get_services()
+    st.title("Policyholder Management")
+
+    tab1, tab2 = st.tabs(["Add Policyholder", "View Policyholders"])
+
+    with tab1:
+        with timed("Policyholder Management: Add Policyholder"):
+            st.subheader("Add New Policyholder")
+            with st.form("add_policyholder"):
+                name = st.text_input("Name")
+                age = st.number_input("Age", min_value=18, max_value=100)
+                policy_type = st.selectbox("Policy Type", [t.value for t in PolicyType])
+                sum_insured = st.number_input("Sum Insured", min_value=0.0)
+
+                if st.form_submit_button("Add Policyholder"):
+                    try:
+                        policyholder_id = f"PH{data_service.count_policyholders() + 1:03d}"
+                        policyholder = Policyholder(
+                            policyholder_id=policyholder_id,
+                            name=name,
+                            age=age,
+                            policy_type=policy_type,
+                            sum_insured=sum_insured
+                        )
+                        data_service.add_policyholder(policyholder.dict())
+                        st.success(f"Policyholder added successfully! ID: {policyholder_id}")
+                    except Exception as e:
+                        st.error(f"Error: {str(e)}")
+
+    with tab2:
+        with timed("Policyholder Management: View Policyholders"):
+            st.subheader("View Policyholders")
+            col1, col2, col3, col4 = st.columns(4)
+            search = col1.text_input("Search", placeholder="ID or name")
+            policy_type_filter = col2.selectbox("Policy Type", ["All"] + [t.value for t in PolicyType])
+            sort_by = col3.selectbox("Sort By", POLICYHOLDER_SORT_FIELDS, key="policyholders_sort_by")
+            descending = col4.checkbox("Descending", key="policyholders_descending")
+
+            policyholders, total = query_page("policyholders", lambda offset, limit: data_service.query_policyholders(
+                policy_type=None if policy_type_filter == "All" else policy_type_filter,
+                search=search or None,
+                sort_by=sort_by,
+                descending=descending,
+                offset=offset,
+                limit=limit
+            ))
+            if policyholders:
+                df = pd.DataFrame(policyholders)
+                df['sum_insured'] = df['sum_insured'].apply(format_currency)
+                st.dataframe(df)
+                page_controls("policyholders", total)
+            else:
+                st.info("No policyholders found")
@@ -0,0 +1,81 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime, time
+import plotly.graph_objects as go
+from services.instrumentation import timed
+from .common import format_currency, get_services
+
+def render():
+    _, risk_service, _, _ = get_services()
+    st.title("Risk Analysis")
+
+    # High Risk Policyholders
+    with timed("Risk Analysis: High Risk Policyholders"):
+        st.subheader("High Risk Policyholders")
+        with st.expander("Risk Rule Settings"):
+            col1, col2, col3 = st.columns(3)
+            max_recent_claims = col1.number_input("Max Recent Claims", min_value=0, value=3)
+            max_claim_ratio = col2.number_input("Max Claim Ratio", min_value=0.0, value=0.8, step=0.05)
+            window_days = col3.number_input("Recent Window (days)", min_value=1, value=365)
+        high_risk = risk_service.identify_high_risk_policyholders(
+            max_recent_claims=max_recent_claims,
+            max_claim_ratio=max_claim_ratio,
+            window_days=window_days
+        )
+        if high_risk:
+            df = pd.DataFrame(high_risk)
+            df['claim_ratio'] = df['claim_ratio'].apply(lambda x: f"{x:.2%}")
+            df['total_claim_amount'] = df['total_claim_amount'].apply(format_currency)
+            st.dataframe(df)
+        else:
+            st.info("No high-risk policyholders found")
+
+    # Claim Frequency
+    with timed("Risk Analysis: Claim Frequency"):
+        st.subheader("Claim Frequency")
+        col1, col2, col3 = st.columns(3)
+        frequency_windows = col1.multiselect("Windows (days)", [30, 90, 180, 365, 730], default=[30, 90, 365])
+        as_of_date = col2.date_input("As Of", value=None, help="Leave empty to use today; set a past date to back-test")
+        frequency_search = col3.text_input("Policyholder ID", key="frequency_policyholder")
+        # A chosen as-of date counts claims up to the end of that day
+        as_of = datetime.combine(as_of_date, time.max) if as_of_date else None
+
+        if frequency_search.strip():
+            frequency = risk_service.calculate_claim_frequency(frequency_search.strip(), frequency_windows, as_of)
+            cols = st.columns(len(frequency_windows) + 1)
+            cols[0].metric("Total Claims", frequency['total_claims'])
+            for col, days in zip(cols[1:], frequency_windows):
+                col.metric(f"Last {days} Days", frequency['claims_in_window'][days])
+
+        if st.button("Score All Policyholders"):
+            frequencies = risk_service.calculate_claim_frequencies(windows=frequency_windows, as_of=as_of)
+            df = pd.DataFrame([
+                {
+                    'policyholder_id': f['policyholder_id'],
+                    'total_claims': f['total_claims'],
+                    **{f"last_{days}_days": count for days, count in f['claims_in_window'].items()},
+                    'claim_frequency': round(f['claim_frequency'], 2)
+                }
+                for f in frequencies
+            ])
+            st.dataframe(df.sort_values('claim_frequency', ascending=False), hide_index=True)
+
+    # Claims by Policy Type
+    with timed("Risk Analysis: Claims by Policy Type"):
+        st.subheader("Claims Analysis by Policy Type")
+        policy_analysis = risk_service.analyze_claims_by_policy_type()
+        if policy_analysis:
+            df = pd.DataFrame(policy_analysis).T
+            df['average_amount'] = df['average_amount'].apply(format_currency)
+            df['total_amount'] = df['total_amount'].apply(format_currency)
+            st.dataframe(df)
+
+            # Visualization
+            fig = go.Figure(data=[
+                go.Bar(name='Total Claims', x=list(policy_analysis.keys()), y=[d['total_claims'] for d in policy_analysis.values()]),
+                go.Bar(name='Pending Claims', x=list(policy_analysis.keys()), y=[d['pending_claims'] for d in policy_analysis.values()])
+            ])
+            fig.update_layout(title="Claims Distribution by Policy Type", barmode='group')
+            st.plotly_chart(fig)
+        else:
+            st.info("No policy analysis data available")